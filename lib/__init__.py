@@ -7,7 +7,9 @@ from .crawler_framework import IntelligentCrawler
 from .llm_extractor import LLMExtractor
 from .rule_parser import RuleParser
 from .config_manager import ConfigManager
-from .utils import HTMLProcessor, TextCleaner
+from .llm_cache import LLMCache
+from .result_cache import ResultCache
+from .utils import HTMLProcessor, TextCleaner, URLNormalizer
 
 __version__ = "1.0.0"
 __author__ = "FPDS Crawler Team"
@@ -17,6 +19,9 @@ __all__ = [
     "LLMExtractor", 
     "RuleParser",
     "ConfigManager",
+    "LLMCache",
+    "ResultCache",
     "HTMLProcessor",
-    "TextCleaner"
+    "TextCleaner",
+    "URLNormalizer"
 ] 
\ No newline at end of file
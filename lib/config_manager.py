@@ -3,8 +3,16 @@ Config Manager Module
 Manages extraction configurations for the intelligent crawling framework
 """
 
+import copy
 import json
 import os
+import hashlib
+import stat
+import tempfile
+import heapq
+from collections import OrderedDict
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional, Union
 from pathlib import Path
 from datetime import datetime
@@ -12,26 +20,188 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import fastjsonschema
+    from fastjsonschema import JsonSchemaException
+except ImportError:
+    fastjsonschema = None
+    JsonSchemaException = ValueError
+
+# Characters that are not allowed in config filenames
+_INVALID_FILENAME_CHARS = frozenset('<>:"/\\|?*')
+_FILENAME_TRANSLATION = str.maketrans(dict.fromkeys(_INVALID_FILENAME_CHARS, '_'))
+
+# Structure every extraction config must follow
+CONFIG_SCHEMA = {
+    'type': 'object',
+    'required': ['selectors', 'confidence_scores', 'fallback_selectors'],
+    'properties': {
+        'selectors': {'type': 'object'}
+    }
+}
+
+
+def _check_config(config: Dict[str, Any]):
+    """Fallback validator used when fastjsonschema is not installed"""
+    for key in CONFIG_SCHEMA['required']:
+        if key not in config:
+            raise JsonSchemaException(f"Missing required key: {key}")
+    
+    if not isinstance(config['selectors'], dict):
+        raise JsonSchemaException("Selectors must be a dictionary")
+
+
+def _loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON, using orjson when available"""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps(data: Any) -> bytes:
+    """Serialize to indented UTF-8 JSON, using orjson when available"""
+    if orjson:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def _read_json(path: Path) -> Any:
+    """Read a JSON file, using orjson when available"""
+    with open(path, 'rb') as f:
+        return _loads(f.read())
+
+
+# Process umask, read once at import (os.umask can only be queried by setting it)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _write_json(path: Path, data: Any):
+    """Write a JSON file in a single serialization pass, atomically replacing any existing file"""
+    payload = _dumps(data)
+    
+    # mkstemp creates owner-only files; keep the target's mode, or use the default for new files
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        mode = 0o666 & ~_UMASK
+    
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    """File modification time in nanoseconds, or None if the file is missing"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _config_digest(config: Dict[str, Any]) -> str:
+    """Structural hash of a config, independent of key order"""
+    if orjson:
+        payload = orjson.dumps(config, option=orjson.OPT_SORT_KEYS)
+    else:
+        payload = json.dumps(config, sort_keys=True).encode('utf-8')
+    return hashlib.sha1(payload).hexdigest()
+
+
 class ConfigManager:
     """
     Manages extraction configurations for intelligent web crawling
     Handles saving, loading, and versioning of extraction configs
     """
     
+    # Maximum number of loaded config files kept in memory
+    CACHE_SIZE = 64
+    
+    # Config validator, compiled once at import time
+    _VALIDATE = staticmethod(fastjsonschema.compile(CONFIG_SCHEMA) if fastjsonschema else _check_config)
+    
     def __init__(self, config_dir: str = "lib/configs"):
         self.config_dir = Path(config_dir)
         self.config_dir.mkdir(parents=True, exist_ok=True)
         
         # Config metadata file
         self.metadata_file = self.config_dir / "config_metadata.json"
-        self.metadata = self._load_metadata()
+        self._metadata_mtime_ns = _mtime_ns(self.metadata_file)
+        self._metadata = self._load_metadata()
+        
+        # LRU cache of loaded config files: name -> (config_data, digest, file mtime_ns)
+        self._config_cache: "OrderedDict[str, tuple]" = OrderedDict()
+    
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Config metadata index, re-read only when the file was changed by someone else"""
+        mtime_ns = _mtime_ns(self.metadata_file)
+        if mtime_ns != self._metadata_mtime_ns:
+            logger.info("Config metadata changed on disk, reloading")
+            self._metadata_mtime_ns = mtime_ns
+            self._metadata = self._load_metadata()
+            self._config_cache.clear()
+        return self._metadata
+    
+    @property
+    def configs_view(self) -> MappingProxyType:
+        """Read-only view of the config index (name -> info)"""
+        return MappingProxyType(self.metadata['configs'])
+    
+    def get_config_info(self, name: str) -> Optional[MappingProxyType]:
+        """
+        Get the metadata entry for a configuration without copying it
+        
+        Args:
+            name: Configuration name
+            
+        Returns:
+            Read-only view of the config info, or None if unknown
+        """
+        info = self.metadata['configs'].get(name)
+        return MappingProxyType(info) if info is not None else None
+    
+    def _cache_get(self, name: str, config_path: Path) -> Optional[tuple]:
+        """Get cached config data if the file is unchanged, marking it as recently used"""
+        entry = self._config_cache.get(name)
+        if entry is None:
+            return None
+        
+        if entry[2] != _mtime_ns(config_path):
+            del self._config_cache[name]
+            return None
+        
+        self._config_cache.move_to_end(name)
+        return entry
+    
+    def _cache_put(self, name: str, config_data: Dict[str, Any], config_path: Path):
+        """Cache a private copy of loaded config data along with its config digest and file mtime"""
+        self._config_cache[name] = (
+            copy.deepcopy(config_data), _config_digest(config_data['config']), _mtime_ns(config_path)
+        )
+        self._config_cache.move_to_end(name)
+        while len(self._config_cache) > self.CACHE_SIZE:
+            self._config_cache.popitem(last=False)
     
     def _load_metadata(self) -> Dict[str, Any]:
         """Load configuration metadata"""
         if self.metadata_file.exists():
             try:
-                with open(self.metadata_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return _read_json(self.metadata_file)
             except Exception as e:
                 logger.error(f"Failed to load config metadata: {e}")
         
@@ -44,9 +214,9 @@ class ConfigManager:
     def _save_metadata(self):
         """Save configuration metadata"""
         try:
-            self.metadata['last_updated'] = datetime.now().isoformat()
-            with open(self.metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(self.metadata, f, indent=2, ensure_ascii=False)
+            self._metadata['last_updated'] = datetime.now().isoformat()
+            _write_json(self.metadata_file, self._metadata)
+            self._metadata_mtime_ns = _mtime_ns(self.metadata_file)
         except Exception as e:
             logger.error(f"Failed to save config metadata: {e}")
     
@@ -65,6 +235,35 @@ class ConfigManager:
         Returns:
             Configuration file path
         """
+        config_path, config_with_metadata = self._prepare_config_file(
+            config, name, description, domain, tags
+        )
+        
+        # Save config file
+        try:
+            self._write_config_file(config_path, config_with_metadata)
+            self._register_config(name, config_path, config_with_metadata)
+            self._save_metadata()
+            
+            logger.info(f"Configuration saved: {config_path}")
+            return str(config_path)
+            
+        except Exception as e:
+            logger.error(f"Failed to save configuration: {e}")
+            raise
+    
+    def _prepare_config_file(self, config: Dict[str, Any], name: str, description: str = "",
+                             domain: str = "", tags: List[str] = None,
+                             reserved_paths: Optional[set] = None) -> tuple:
+        """
+        Validate a configuration and build its file path and contents
+        
+        Args:
+            reserved_paths: Paths already claimed by configs not written yet; the new path is added
+        
+        Returns:
+            Tuple of (config file path, config with metadata)
+        """
         # Validate config
         if not self._validate_config(config):
             raise ValueError("Invalid configuration structure")
@@ -72,8 +271,16 @@ class ConfigManager:
         # Create config filename
         safe_name = self._sanitize_filename(name)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{safe_name}_{timestamp}.json"
-        config_path = self.config_dir / filename
+        config_path = self.config_dir / f"{safe_name}_{timestamp}.json"
+        
+        # Names that sanitize alike within the same second must not share a file
+        if reserved_paths is None:
+            reserved_paths = set()
+        suffix = 1
+        while config_path in reserved_paths or self._path_in_use(config_path, name):
+            config_path = self.config_dir / f"{safe_name}_{timestamp}_{suffix}.json"
+            suffix += 1
+        reserved_paths.add(config_path)
         
         # Add metadata to config
         config_with_metadata = {
@@ -89,30 +296,85 @@ class ConfigManager:
             }
         }
         
-        # Save config file
-        try:
-            with open(config_path, 'w', encoding='utf-8') as f:
-                json.dump(config_with_metadata, f, indent=2, ensure_ascii=False)
-            
-            # Update metadata
-            self.metadata['configs'][name] = {
-                'file_path': str(config_path),
-                'description': description,
-                'domain': domain,
-                'tags': tags or [],
-                'created_at': config_with_metadata['metadata']['created_at'],
-                'fields': config_with_metadata['metadata']['fields'],
-                'version': '1.0'
-            }
+        return config_path, config_with_metadata
+    
+    def _path_in_use(self, config_path: Path, name: str) -> bool:
+        """Check whether another configuration is stored at a path"""
+        path = str(config_path)
+        return any(
+            info.get('file_path') == path and other != name
+            for other, info in self.metadata['configs'].items()
+        )
+    
+    def _write_config_file(self, config_path: Path, config_with_metadata: Dict[str, Any]):
+        """Write a config file to disk (file I/O only, safe to run in worker threads)"""
+        _write_json(config_path, config_with_metadata)
+    
+    def _register_config(self, name: str, config_path: Path, config_with_metadata: Dict[str, Any]):
+        """Record a written config file in the metadata index (without saving it)"""
+        metadata = config_with_metadata['metadata']
+        self.metadata['configs'][name] = {
+            'file_path': str(config_path),
+            'description': metadata['description'],
+            'domain': metadata['domain'],
+            'tags': metadata['tags'],
+            'created_at': metadata['created_at'],
+            'fields': metadata['fields'],
+            'version': '1.0'
+        }
+        self._cache_put(name, config_with_metadata, config_path)
+    
+    def _import_entries(self, entries: List[tuple]) -> int:
+        """
+        Write imported configurations concurrently
+        
+        Args:
+            entries: List of (name, config, info) tuples
             
+        Returns:
+            Number of configurations imported
+        """
+        prepared = []
+        reserved_paths = set()
+        for name, config, info in entries:
+            try:
+                config_path, config_with_metadata = self._prepare_config_file(
+                    config=config,
+                    name=name,
+                    description=info.get('description', ''),
+                    domain=info.get('domain', ''),
+                    tags=info.get('tags', []),
+                    reserved_paths=reserved_paths
+                )
+                prepared.append((name, config_path, config_with_metadata))
+            except Exception as e:
+                logger.warning(f"Failed to import config '{name}': {e}")
+        
+        if not prepared:
+            return 0
+        
+        # Workers only write files; the metadata index is updated here afterwards
+        imported_count = 0
+        max_workers = min(32, (os.cpu_count() or 1) * 4, len(prepared))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                (name, config_path, config_with_metadata,
+                 executor.submit(self._write_config_file, config_path, config_with_metadata))
+                for name, config_path, config_with_metadata in prepared
+            ]
+            
+            for name, config_path, config_with_metadata, future in futures:
+                try:
+                    future.result()
+                    self._register_config(name, config_path, config_with_metadata)
+                    imported_count += 1
+                except Exception as e:
+                    logger.warning(f"Failed to import config '{name}': {e}")
+        
+        if imported_count:
             self._save_metadata()
-            
-            logger.info(f"Configuration saved: {config_path}")
-            return str(config_path)
-            
-        except Exception as e:
-            logger.error(f"Failed to save configuration: {e}")
-            raise
+        
+        return imported_count
     
     def load_config(self, name: str) -> Dict[str, Any]:
         """
@@ -130,12 +392,17 @@ class ConfigManager:
         config_info = self.metadata['configs'][name]
         config_path = Path(config_info['file_path'])
         
+        cached = self._cache_get(name, config_path)
+        if cached:
+            # Callers may modify the config, so never hand out the cached object
+            return copy.deepcopy(cached[0]['config'])
+        
         if not config_path.exists():
             raise FileNotFoundError(f"Configuration file not found: {config_path}")
         
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config_data = json.load(f)
+            config_data = _read_json(config_path)
+            self._cache_put(name, config_data, config_path)
             
             logger.info(f"Configuration loaded: {name}")
             return config_data['config']
@@ -160,8 +427,7 @@ class ConfigManager:
             raise FileNotFoundError(f"Configuration file not found: {config_path}")
         
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config_data = json.load(f)
+            config_data = _read_json(config_path)
             
             # Handle both old and new format
             if 'config' in config_data:
@@ -227,6 +493,7 @@ class ConfigManager:
             
             # Remove from metadata
             del self.metadata['configs'][name]
+            self._config_cache.pop(name, None)
             self._save_metadata()
             
             logger.info(f"Configuration deleted: {name}")
@@ -259,9 +526,17 @@ class ConfigManager:
         config_path = Path(config_info['file_path'])
         
         try:
+            cached = self._cache_get(name, config_path)
+            
+            # Nothing but the timestamp changes, so skip rewriting the config file
+            if cached and description is None and _config_digest(config) == cached[1]:
+                self.metadata['configs'][name]['updated_at'] = datetime.now().isoformat()
+                self._save_metadata()
+                logger.info(f"Configuration unchanged: {name}")
+                return True
+            
             # Load existing config data
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config_data = json.load(f)
+            config_data = copy.deepcopy(cached[0]) if cached else _read_json(config_path)
             
             # Update config
             config_data['config'] = config
@@ -274,18 +549,20 @@ class ConfigManager:
             config_data['metadata']['fields'] = list(config.get('selectors', {}).keys())
             
             # Save updated config
-            with open(config_path, 'w', encoding='utf-8') as f:
-                json.dump(config_data, f, indent=2, ensure_ascii=False)
+            _write_json(config_path, config_data)
+            self._cache_put(name, config_data, config_path)
             
             # Update metadata
             self.metadata['configs'][name]['description'] = description or config_info['description']
             self.metadata['configs'][name]['fields'] = config_data['metadata']['fields']
+            self.metadata['configs'][name]['updated_at'] = config_data['metadata']['updated_at']
             self._save_metadata()
             
             logger.info(f"Configuration updated: {name}")
             return True
             
         except Exception as e:
+            self._config_cache.pop(name, None)
             logger.error(f"Failed to update configuration '{name}': {e}")
             return False
     
@@ -323,11 +600,14 @@ class ConfigManager:
             'domains': list(domains),
             'tags': list(all_tags),
             'fields': list(all_fields),
-            'recent_configs': sorted(
-                [{'name': name, **info} for name, info in configs.items()],
-                key=lambda x: x['created_at'],
-                reverse=True
-            )[:5]
+            'recent_configs': [
+                {'name': name, **info}
+                for _, name, info in heapq.nlargest(
+                    5,
+                    ((info['created_at'], name, info) for name, info in configs.items()),
+                    key=lambda t: t[0]
+                )
+            ]
         }
     
     def export_configs(self, output_path: Union[str, Path], format: str = 'json'):
@@ -357,8 +637,7 @@ class ConfigManager:
                 except Exception as e:
                     logger.warning(f"Failed to load config '{name}' for export: {e}")
             
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, indent=2, ensure_ascii=False)
+            _write_json(output_path, export_data)
         
         elif format.lower() == 'zip':
             # Export as ZIP archive
@@ -366,7 +645,7 @@ class ConfigManager:
             
             with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
                 # Add metadata
-                zipf.writestr('metadata.json', json.dumps(self.metadata, indent=2))
+                zipf.writestr('metadata.json', _dumps(self.metadata))
                 
                 # Add config files
                 for name, info in self.metadata['configs'].items():
@@ -391,28 +670,16 @@ class ConfigManager:
         
         if format.lower() == 'json':
             # Import from JSON file
-            with open(import_path, 'r', encoding='utf-8') as f:
-                import_data = json.load(f)
+            import_data = _read_json(import_path)
             
-            imported_count = 0
+            entries = []
             for name, data in import_data.get('configs', {}).items():
                 try:
-                    config = data['config']
-                    info = data['info']
-                    
-                    # Save config
-                    self.save_config(
-                        config=config,
-                        name=name,
-                        description=info.get('description', ''),
-                        domain=info.get('domain', ''),
-                        tags=info.get('tags', [])
-                    )
-                    imported_count += 1
-                    
+                    entries.append((name, data['config'], data['info']))
                 except Exception as e:
                     logger.warning(f"Failed to import config '{name}': {e}")
             
+            imported_count = self._import_entries(entries)
             logger.info(f"Imported {imported_count} configurations")
         
         elif format.lower() == 'zip':
@@ -421,28 +688,20 @@ class ConfigManager:
             
             with zipfile.ZipFile(import_path, 'r') as zipf:
                 # Read metadata
-                metadata_data = json.loads(zipf.read('metadata.json'))
+                metadata_data = _loads(zipf.read('metadata.json'))
                 
-                imported_count = 0
+                entries = []
                 for name, info in metadata_data.get('configs', {}).items():
                     try:
                         # Extract config file
                         config_filename = Path(info['file_path']).name
-                        config_data = json.loads(zipf.read(config_filename))
-                        
-                        # Save config
-                        self.save_config(
-                            config=config_data['config'],
-                            name=name,
-                            description=info.get('description', ''),
-                            domain=info.get('domain', ''),
-                            tags=info.get('tags', [])
-                        )
-                        imported_count += 1
+                        config_data = _loads(zipf.read(config_filename))
+                        entries.append((name, config_data['config'], info))
                         
                     except Exception as e:
                         logger.warning(f"Failed to import config '{name}': {e}")
                 
+                imported_count = self._import_entries(entries)
                 logger.info(f"Imported {imported_count} configurations")
     
     def _validate_config(self, config: Dict[str, Any]) -> bool:
@@ -455,18 +714,12 @@ class ConfigManager:
         Returns:
             True if valid
         """
-        required_keys = ['selectors', 'confidence_scores', 'fallback_selectors']
-        
-        for key in required_keys:
-            if key not in config:
-                logger.error(f"Missing required key: {key}")
-                return False
-        
-        if not isinstance(config['selectors'], dict):
-            logger.error("Selectors must be a dictionary")
+        try:
+            self._VALIDATE(config)
+            return True
+        except JsonSchemaException as e:
+            logger.error(f"Invalid configuration: {e}")
             return False
-        
-        return True
     
     def _sanitize_filename(self, filename: str) -> str:
         """
@@ -478,10 +731,11 @@ class ConfigManager:
         Returns:
             Sanitized filename
         """
-        # Remove or replace invalid characters
-        invalid_chars = '<>:"/\\|?*'
-        for char in invalid_chars:
-            filename = filename.replace(char, '_')
+        # Remove or replace invalid characters (most names need no replacement)
+        if not any(c in _INVALID_FILENAME_CHARS for c in filename):
+            return filename.strip(' .')[:100]
+        
+        filename = filename.translate(_FILENAME_TRANSLATION)
         
         # Remove leading/trailing spaces and dots
         filename = filename.strip(' .')
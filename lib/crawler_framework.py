@@ -6,15 +6,19 @@ Main orchestrator for the two-phase crawling approach
 import asyncio
 import json
 import os
+import time
+from functools import cached_property
 from typing import Dict, List, Any, Optional, Union
 from pathlib import Path
 from datetime import datetime
 import logging
 
 from .llm_extractor import LLMExtractor
-from .rule_parser import RuleParser
+from .rule_parser import RuleParser, HAS_AIOHTTP, NDJSONWriter, ExtractionStatsAccumulator
 from .config_manager import ConfigManager
-from .utils import HTMLProcessor, TextCleaner
+from .llm_cache import LLMCache
+from .result_cache import ResultCache
+from .utils import HTMLProcessor, TextCleaner, URLNormalizer
 
 logger = logging.getLogger(__name__)
 
@@ -24,10 +28,26 @@ class IntelligentCrawler:
     Implements the two-phase approach: LLM bootstrap + scalable rule-based parsing
     """
     
-    def __init__(self, api_key: Optional[str] = None, config_dir: str = "lib/configs"):
-        self.llm_extractor = LLMExtractor(api_key)
-        self.config_manager = ConfigManager(config_dir)
+    def __init__(self, api_key: Optional[str] = None, config_dir: str = "lib/configs",
+                 parser: Optional[str] = None, use_result_cache: bool = True,
+                 result_cache_ttl: Optional[float] = 24 * 3600):
+        """
+        Args:
+            api_key: OpenAI API key (defaults to OPENAI_API_KEY)
+            config_dir: Directory where extraction configs are stored
+            parser: HTML parser backend for Phase 2 ('lexbor', 'lxml' or 'bs4');
+                defaults to the fastest available. Use 'bs4' for pages the faster parsers mishandle.
+            use_result_cache: Reuse per-URL extraction results from earlier crawls instead of refetching
+            result_cache_ttl: Seconds a cached result stays valid (None for no expiry)
+        """
+        self.parser = parser
+        self._api_key = api_key
+        self._config_dir = config_dir
+        self.use_result_cache = use_result_cache
+        self.result_cache_ttl = result_cache_ttl
+        self.llm_cache = LLMCache(Path(config_dir) / ".llm_cache")
         self.rule_parser = None  # Will be initialized when config is loaded
+        self.current_config_name = None
         
         # Statistics tracking
         self.stats = {
@@ -38,6 +58,40 @@ class IntelligentCrawler:
             'total_extractions': 0
         }
     
+    @cached_property
+    def llm_extractor(self) -> LLMExtractor:
+        """LLM extractor, created on first use so rule-based crawling never pays for the LLM client"""
+        return LLMExtractor(self._api_key)
+    
+    @cached_property
+    def config_manager(self) -> ConfigManager:
+        """Config manager, created on first use (loads config metadata from disk)"""
+        return ConfigManager(self._config_dir)
+    
+    @cached_property
+    def result_cache(self) -> Optional[ResultCache]:
+        """Per-URL extraction result cache, opened on first use (None when disabled)"""
+        if not self.use_result_cache:
+            return None
+        return ResultCache(Path(self._config_dir) / ".result_cache.sqlite", ttl=self.result_cache_ttl)
+    
+    def close(self):
+        """Release resources held by the crawler (the result cache database connection)"""
+        result_cache = self.__dict__.pop('result_cache', None)
+        if result_cache is not None:
+            result_cache.close()
+    
+    def __enter__(self) -> 'IntelligentCrawler':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    @cached_property
+    def _fetcher(self) -> RuleParser:
+        """Config-less parser reused for fetching bootstrap example pages"""
+        return RuleParser(parser=self.parser)
+    
     async def bootstrap_extraction_config(self, example_urls: List[str], 
                                         target_fields: List[str] = None,
                                         config_name: str = None,
@@ -63,26 +117,23 @@ class IntelligentCrawler:
         
         logger.info(f"Starting Phase 1: Bootstrap extraction config from {len(example_urls)} example URLs")
         
-        # Initialize rule parser for fetching example pages
-        temp_parser = RuleParser()
+        # Fetch example pages concurrently in the default thread pool; each fetch is
+        # network-latency bound (run_in_executor rather than asyncio.to_thread for Python 3.8)
+        loop = asyncio.get_running_loop()
+        fetched = await asyncio.gather(
+            *[loop.run_in_executor(None, self._fetcher.fetch_html, url) for url in example_urls],
+            return_exceptions=True
+        )
         
-        # Fetch example pages
         example_pages = []
-        for url in example_urls:
-            try:
-                result = temp_parser.crawl_page(url)
-                if result.get('error'):
-                    logger.warning(f"Failed to fetch {url}: {result['error']}")
-                    continue
-                
-                # Get HTML content
-                html_content = result.get('response_metadata', {}).get('raw_content', '')
-                if html_content:
-                    example_pages.append(html_content)
-                    logger.info(f"Successfully fetched example page: {url}")
-                
-            except Exception as e:
-                logger.error(f"Error fetching {url}: {e}")
+        for url, html_content in zip(example_urls, fetched):
+            if isinstance(html_content, Exception):
+                logger.warning(f"Failed to fetch {url}: {html_content}")
+                continue
+            
+            if html_content:
+                example_pages.append(html_content)
+                logger.info(f"Successfully fetched example page: {url}")
         
         if not example_pages:
             raise ValueError("No example pages could be fetched")
@@ -90,24 +141,27 @@ class IntelligentCrawler:
         # Use LLM to analyze page structure
         logger.info("Analyzing page structure with LLM...")
         
-        # Use the first page for initial analysis
-        config = self.llm_extractor.analyze_page_structure(
-            example_pages[0], 
-            target_fields
-        )
-        
-        # Enhance config with multiple examples if available
-        if len(example_pages) > 1:
-            logger.info("Enhancing config with multiple examples...")
-            config = self.llm_extractor.enhance_config_with_examples(
-                config, 
-                example_pages[1:]  # Use remaining pages for enhancement
+        # Identical example pages produce the same config, so reuse earlier analyses
+        cache_key = LLMCache.make_key(self.llm_extractor.model, target_fields, example_pages)
+        config = self.llm_cache.get(cache_key)
+        
+        if config is not None:
+            logger.info("Using cached LLM analysis for example pages")
+        else:
+            # Analyze all example pages together in as few requests as possible
+            config = self.llm_extractor.analyze_pages_batch(
+                example_pages, 
+                target_fields
             )
+            
+            # Fallback configs from failed analyses must not be replayed for the cache TTL
+            if not config.get('error') and config.get('selectors'):
+                self.llm_cache.set(cache_key, config)
         
         # Generate config name if not provided
         if not config_name:
             domain_part = domain.replace('.', '_') if domain else "unknown"
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
             config_name = f"{domain_part}_config_{timestamp}"
         
         # Save configuration
@@ -120,7 +174,8 @@ class IntelligentCrawler:
         )
         
         # Initialize rule parser with the new config
-        self.rule_parser = RuleParser(config)
+        self._use_config(config)
+        self.current_config_name = config_name
         
         # Update statistics
         self.stats['phase1_calls'] += 1
@@ -143,7 +198,8 @@ class IntelligentCrawler:
         """
         try:
             config = self.config_manager.load_config(config_name)
-            self.rule_parser = RuleParser(config)
+            self._use_config(config)
+            self.current_config_name = config_name
             
             logger.info(f"Loaded existing configuration: {config_name}")
             return True
@@ -152,6 +208,13 @@ class IntelligentCrawler:
             logger.error(f"Failed to load configuration '{config_name}': {e}")
             return False
     
+    def _use_config(self, config: Dict[str, Any]):
+        """Point the Phase 2 parser at a config, reusing the existing parser and its HTTP session"""
+        if self.rule_parser:
+            self.rule_parser.load_config(config)
+        else:
+            self.rule_parser = RuleParser(config, parser=self.parser)
+    
     def crawl_single_page(self, url: str) -> Dict[str, Any]:
         """
         Crawl a single page using the loaded configuration
@@ -167,7 +230,24 @@ class IntelligentCrawler:
         
         logger.info(f"Crawling single page: {url}")
         
-        result = self.rule_parser.crawl_page(url)
+        result_cache = self.result_cache
+        if result_cache is None:
+            result = self.rule_parser.crawl_page(url)
+        else:
+            # Revalidate a previous extraction of this (url, config) pair with a conditional GET
+            cache_key = ResultCache.make_key(url, self.rule_parser.config_fingerprint)
+            cached = result_cache.get_validated(cache_key)
+            etag, last_modified, cached_result = cached if cached else (None, None, None)
+            
+            result = self.rule_parser.crawl_page_conditional(url, etag, last_modified)
+            
+            if result is None:
+                result = cached_result
+            else:
+                response_metadata = result.get('response_metadata', {})
+                result_cache.set_validated(
+                    cache_key, response_metadata.get('etag'), response_metadata.get('last_modified'), result
+                )
         
         # Update statistics
         self.stats['phase2_calls'] += 1
@@ -193,19 +273,89 @@ class IntelligentCrawler:
         
         logger.info(f"Starting Phase 2: Crawling {len(urls)} pages with rule-based parser")
         
-        results = self.rule_parser.crawl_multiple_pages(urls, max_workers)
+        results_by_url, pending_urls = self._split_cached(urls)
+        for result in self.rule_parser.crawl_multiple_pages(pending_urls, max_workers):
+            results_by_url[result['url']] = result
+            self._remember_result(result)
         
-        # Update statistics
-        self.stats['phase2_calls'] += 1
-        self.stats['pages_crawled'] += len(urls)
-        for result in results:
-            if result.get('extracted_fields'):
-                self.stats['total_extractions'] += len(result['extracted_fields'])
+        results = [results_by_url[url] for url in urls]
+        self._record_phase2_results(len(urls), self._count_extractions(results))
+        
+        return results
+    
+    async def crawl_multiple_pages_async(self, urls: List[str], concurrency: int = 300) -> List[Dict[str, Any]]:
+        """
+        Crawl multiple pages with asyncio + aiohttp using the loaded configuration
+        
+        Args:
+            urls: List of URLs to crawl
+            concurrency: Maximum number of in-flight requests
+            
+        Returns:
+            List of extracted data dictionaries
+        """
+        if not self.rule_parser:
+            raise ValueError("No extraction configuration loaded. Run bootstrap_extraction_config first or load_existing_config.")
+        
+        logger.info(f"Starting Phase 2: Crawling {len(urls)} pages with rule-based parser (async)")
         
-        logger.info(f"Phase 2 completed. Crawled {len(urls)} pages")
+        results_by_url, pending_urls = self._split_cached(urls)
+        for result in await self.rule_parser.crawl_multiple_pages_async(pending_urls, concurrency):
+            results_by_url[result['url']] = result
+            self._remember_result(result)
+        
+        results = [results_by_url[url] for url in urls]
+        self._record_phase2_results(len(urls), self._count_extractions(results))
         
         return results
     
+    def _split_cached(self, urls: List[str]) -> tuple:
+        """
+        Deduplicate URLs and look up previously cached results for the loaded config
+        
+        Args:
+            urls: List of URLs to crawl
+            
+        Returns:
+            Tuple of (cached results keyed by URL, unique URLs that still need crawling)
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        cached = {}
+        
+        if self.current_config_name and self.result_cache is not None:
+            for url in unique_urls:
+                result = self.result_cache.get(
+                    url, self.current_config_name, self.rule_parser.config_fingerprint
+                )
+                if result is not None:
+                    cached[url] = result
+        
+        pending_urls = [url for url in unique_urls if url not in cached]
+        if len(pending_urls) < len(urls):
+            logger.info(f"Skipping {len(urls) - len(pending_urls)} duplicate or cached URLs")
+        
+        return cached, pending_urls
+    
+    def _remember_result(self, result: Dict[str, Any]):
+        """Offer a fresh full extraction result to the result cache"""
+        if self.current_config_name and self.result_cache is not None:
+            self.result_cache.set(
+                result['url'], self.current_config_name, result, self.rule_parser.config_fingerprint
+            )
+    
+    def _record_phase2_results(self, page_count: int, extraction_count: int):
+        """Update statistics after a Phase 2 crawl"""
+        self.stats['phase2_calls'] += 1
+        self.stats['pages_crawled'] += page_count
+        self.stats['total_extractions'] += extraction_count
+        
+        logger.info(f"Phase 2 completed. Crawled {page_count} pages")
+    
+    @staticmethod
+    def _count_extractions(results: List[Dict[str, Any]]) -> int:
+        """Total number of extracted fields across results"""
+        return sum(len(r['extracted_fields']) for r in results if r.get('extracted_fields'))
+    
     async def full_crawling_workflow(self, example_urls: List[str], 
                                    target_urls: List[str],
                                    target_fields: List[str] = None,
@@ -213,7 +363,9 @@ class IntelligentCrawler:
                                    description: str = "",
                                    domain: str = "",
                                    tags: List[str] = None,
-                                   max_workers: int = 5) -> Dict[str, Any]:
+                                   max_workers: int = 5,
+                                   concurrency: int = 300,
+                                   output_path: Union[str, Path] = None) -> Dict[str, Any]:
         """
         Complete workflow: Bootstrap config + Crawl target pages
         
@@ -225,11 +377,16 @@ class IntelligentCrawler:
             description: Configuration description
             domain: Target domain
             tags: Configuration tags
-            max_workers: Maximum concurrent workers for crawling
+            max_workers: Maximum concurrent workers for threaded crawling
+            concurrency: Maximum in-flight requests for async crawling
+            output_path: If given, extraction results are streamed to this NDJSON file as pages
+                complete instead of being returned under 'extraction_results'
             
         Returns:
             Complete workflow results
         """
+        started_at = datetime.now().isoformat()
+        
         logger.info("Starting complete intelligent crawling workflow")
         logger.info(f"Phase 1: {len(example_urls)} example URLs")
         logger.info(f"Phase 2: {len(target_urls)} target URLs")
@@ -244,31 +401,109 @@ class IntelligentCrawler:
             tags=tags
         )
         
-        # Phase 2: Crawl target pages
-        results = self.crawl_multiple_pages(target_urls, max_workers)
+        # Canonicalize target URLs so tracking-parameter variants of a page are fetched once;
+        # results are still reported under the URLs the caller passed
+        crawl_urls = [URLNormalizer.normalize(url) for url in target_urls]
+        
+        # Phase 2: Crawl target pages; statistics are gathered in the same pass that
+        # collects (or streams) each result
+        if output_path:
+            with NDJSONWriter(output_path) as writer:
+                results, accumulator = await self._run_phase2(
+                    crawl_urls, max_workers, concurrency, writer, report_urls=target_urls
+                )
+        else:
+            results, accumulator = await self._run_phase2(
+                crawl_urls, max_workers, concurrency, report_urls=target_urls
+            )
         
-        # Generate statistics
-        stats = self.rule_parser.get_extraction_stats(results)
+        stats = accumulator.summary()
         
         workflow_results = {
             'config_name': config_name,
             'phase1_example_urls': example_urls,
             'phase2_target_urls': target_urls,
-            'extraction_results': results,
             'statistics': stats,
             'workflow_metadata': {
-                'started_at': datetime.now().isoformat(),
-                'total_pages_processed': len(results),
-                'successful_extractions': len([r for r in results if r.get('extracted_fields')]),
+                'started_at': started_at,
+                'total_pages_processed': accumulator.total_pages,
+                'successful_extractions': accumulator.pages_with_fields,
                 'average_success_rate': stats.get('avg_extraction_success_rate', 0)
             }
         }
         
+        if output_path:
+            workflow_results['output_path'] = str(output_path)
+        else:
+            workflow_results['extraction_results'] = results
+        
         logger.info("Complete workflow finished successfully")
         logger.info(f"Final statistics: {stats}")
         
         return workflow_results
     
+    async def _run_phase2(self, urls: List[str], max_workers: int, concurrency: int,
+                          writer: NDJSONWriter = None, report_urls: List[str] = None) -> tuple:
+        """
+        Crawl target pages, accumulating statistics as each result completes
+        
+        Args:
+            urls: List of URLs to crawl
+            max_workers: Maximum concurrent workers for threaded crawling
+            concurrency: Maximum in-flight requests for async crawling
+            writer: If given, results are written here instead of being collected
+            report_urls: URLs to report in results, parallel to urls (defaults to urls)
+            
+        Returns:
+            Tuple of (list of results or None when streamed, ExtractionStatsAccumulator)
+        """
+        if not self.rule_parser:
+            raise ValueError("No extraction configuration loaded. Run bootstrap_extraction_config first or load_existing_config.")
+        
+        logger.info(f"Starting Phase 2: Crawling {len(urls)} pages with rule-based parser")
+        
+        accumulator = ExtractionStatsAccumulator()
+        results = None if writer else []
+        
+        # Each unique URL is fetched at most once; every input that maps to it reuses its result
+        targets = {}
+        for url, reported_url in zip(urls, report_urls or urls):
+            targets.setdefault(url, []).append(reported_url)
+        
+        cached, pending_urls = self._split_cached(urls)
+        
+        def handle(result: Dict[str, Any]):
+            crawled_url = result['url']
+            for reported_url in targets[crawled_url]:
+                reported = result if reported_url == crawled_url else {**result, 'url': reported_url}
+                accumulator.add(reported)
+                if writer:
+                    writer.write(reported)
+                else:
+                    results.append(reported)
+        
+        for result in cached.values():
+            handle(result)
+        
+        # Prefer the asyncio pipeline when aiohttp is installed; streamed output uses the
+        # fused fetch/extract pipeline, which keeps no page bodies or response metadata
+        if HAS_AIOHTTP:
+            stream = (self.rule_parser.pipeline_stream(pending_urls, concurrency) if writer
+                      else self.rule_parser.iter_crawl_async(pending_urls, concurrency))
+            async for result in stream:
+                # Compact streamed results must not be served later in place of full ones
+                if not writer:
+                    self._remember_result(result)
+                handle(result)
+        else:
+            for result in self.rule_parser.iter_crawl(pending_urls, max_workers):
+                self._remember_result(result)
+                handle(result)
+        
+        self._record_phase2_results(len(urls), accumulator.total_fields)
+        
+        return results, accumulator
+    
     def save_results(self, results: List[Dict[str, Any]], 
                     output_path: Union[str, Path], 
                     format: str = 'json') -> str:
@@ -278,7 +513,7 @@ class IntelligentCrawler:
         Args:
             results: List of extraction results
             output_path: Output file path
-            format: Output format ('json' or 'csv')
+            format: Output format ('json', 'ndjson' or 'csv')
             
         Returns:
             Output file path
@@ -304,9 +539,9 @@ class IntelligentCrawler:
         # Add current configuration info
         if self.rule_parser and self.rule_parser.config:
             stats['current_config'] = {
-                'fields': list(self.rule_parser.config.get('selectors', {}).keys()),
-                'confidence_scores': self.rule_parser.config.get('confidence_scores', {}),
-                'has_fallbacks': bool(self.rule_parser.config.get('fallback_selectors'))
+                'fields': list(self.rule_parser._selector_keys),
+                'confidence_scores': self.rule_parser._confidence,
+                'has_fallbacks': self.rule_parser._has_fallbacks
             }
         
         return stats
@@ -373,7 +608,7 @@ class IntelligentCrawler:
         """
         try:
             config = self.config_manager.load_config(config_name)
-            config_info = self.config_manager.metadata['configs'].get(config_name, {})
+            config_info = self.config_manager.get_config_info(config_name) or {}
             
             return {
                 'name': config_name,
@@ -404,6 +639,10 @@ class IntelligentCrawler:
         """
         success = self.config_manager.update_config(config_name, new_config, description)
         
+        if success and self.result_cache is not None:
+            # Cached results were extracted with the old rules
+            self.result_cache.invalidate(config_name)
+        
         if success and self.rule_parser:
             # Reload the updated config
             self.rule_parser.load_config(new_config)
@@ -420,4 +659,9 @@ class IntelligentCrawler:
         Returns:
             True if deleted successfully
         """
-        return self.config_manager.delete_config(config_name) 
\ No newline at end of file
+        success = self.config_manager.delete_config(config_name)
+        
+        if success and self.result_cache is not None:
+            self.result_cache.invalidate(config_name)
+        
+        return success
\ No newline at end of file
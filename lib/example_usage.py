@@ -10,6 +10,11 @@ import os
 from pathlib import Path
 from lib import IntelligentCrawler
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 async def example_news_crawling():
     """
     Example: Crawling news articles from a hypothetical news site
@@ -135,8 +140,12 @@ async def example_complete_workflow():
         
         # Save workflow results
         workflow_file = "workflow_results.json"
-        with open(workflow_file, 'w') as f:
-            json.dump(workflow_results, f, indent=2)
+        if orjson:
+            with open(workflow_file, 'wb') as f:
+                f.write(orjson.dumps(workflow_results, option=orjson.OPT_INDENT_2))
+        else:
+            with open(workflow_file, 'w') as f:
+                json.dump(workflow_results, f, indent=2)
         print(f"✅ Workflow results saved to: {workflow_file}")
         
         return workflow_results
@@ -0,0 +1,159 @@
+"""
+LLM Cache Module
+Content-addressed disk cache for deterministic LLM bootstrap responses
+"""
+
+import hashlib
+import json
+import re
+import time
+from typing import Dict, List, Any, Optional, Protocol
+from pathlib import Path
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_SCRIPT_STYLE_RE = re.compile(r'<(script|style)[^>]*>.*?</\1>', re.DOTALL | re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+class CacheBackend(Protocol):
+    """Minimal interface for LLM response caches"""
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        ...
+    
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        ...
+    
+    def delete(self, key: str) -> None:
+        ...
+
+
+def normalize_html(html_content: str) -> str:
+    """
+    Normalize HTML so trivially different captures of a page hash the same
+    
+    Args:
+        html_content: Raw HTML content
+    
+    Returns:
+        HTML without scripts/styles and with collapsed whitespace
+    """
+    if LexborHTMLParser:
+        tree = LexborHTMLParser(html_content)
+        tree.strip_tags(['script', 'style'])
+        html_content = tree.html or ''
+    else:
+        html_content = _SCRIPT_STYLE_RE.sub('', html_content)
+    
+    return _WHITESPACE_RE.sub(' ', html_content).strip()
+
+
+class LLMCache:
+    """
+    File-backed cache for LLM responses keyed by a SHA-256 of the request content
+    Entries expire based on file modification time
+    """
+    
+    def __init__(self, cache_dir: str = "lib/configs/.llm_cache", ttl: Optional[float] = 7 * 24 * 3600):
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+    
+    @staticmethod
+    def make_key(model: str, target_fields: Optional[List[str]], pages: List[str]) -> str:
+        """
+        Build a cache key for an LLM analysis request
+        
+        Args:
+            model: LLM model name
+            target_fields: Fields requested from the LLM
+            pages: HTML content of the analyzed pages
+        
+        Returns:
+            Hex SHA-256 cache key
+        """
+        html_hashes = [
+            hashlib.sha256(normalize_html(page).encode('utf-8')).hexdigest()
+            for page in pages
+        ]
+        payload = json.dumps({
+            'model': model,
+            'fields': sorted(target_fields or []),
+            'html_hash': html_hashes
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached response
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Cached value or None on miss/expiry
+        """
+        path = self._path(key)
+        try:
+            if self.ttl is not None and time.time() - path.stat().st_mtime > self.ttl:
+                path.unlink()
+                return None
+            
+            if orjson:
+                return orjson.loads(path.read_bytes())
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Failed to read LLM cache entry {key}: {e}")
+            return None
+    
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """
+        Store a response in the cache
+        
+        Args:
+            key: Cache key
+            value: JSON-serializable response
+        """
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            tmp_path = path.with_suffix('.tmp')
+            if orjson:
+                tmp_path.write_bytes(orjson.dumps(value))
+            else:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(value, f, ensure_ascii=False)
+            tmp_path.replace(path)
+        except Exception as e:
+            logger.warning(f"Failed to write LLM cache entry {key}: {e}")
+    
+    def delete(self, key: str) -> None:
+        """
+        Remove a cached response
+        
+        Args:
+            key: Cache key
+        """
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Failed to delete LLM cache entry {key}: {e}")
@@ -3,13 +3,20 @@ LLM Extractor Module
 Phase 1: Bootstrap extraction via LLM to understand page structure
 """
 
+import copy
 import json
 import os
 import re
-from typing import Dict, List, Any, Optional
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import cached_property
+from typing import Dict, List, Any, Optional, Union
 from pathlib import Path
 import logging
 
+from .llm_cache import LLMCache
+
 logger = logging.getLogger(__name__)
 
 try:
@@ -19,16 +26,108 @@ except ImportError:
     logger.warning("OpenAI not installed. LLM features will be disabled.")
     openai = None
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+try:
+    import lxml.html as lxml_html
+except ImportError:
+    lxml_html = None
+
+# HTML cleanup and response parsing patterns, compiled once
+_SCRIPT_RE = re.compile(r'<script[^>]*>.*?</script>', re.DOTALL)
+_STYLE_RE = re.compile(r'<style[^>]*>.*?</style>', re.DOTALL)
+_WS_RE = re.compile(r'\s+')
+_TAG_CLASS_RE = re.compile(r'<([a-zA-Z][a-zA-Z0-9]*)(?:[^>]*?\sclass\s*=\s*["\']([^"\']*)["\'])?', re.IGNORECASE)
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch either
+_json_loads = orjson.loads if orjson else json.loads
+_FIELD_TOKEN_RE = re.compile(r'[a-z0-9]+')
+_OPEN_TAG_RE = re.compile(r'<([a-zA-Z][a-zA-Z0-9]*)([^>]*)>')
+_ID_CLASS_RE = re.compile(r'\b(id|class)\s*=\s*["\']([^"\']*)["\']', re.IGNORECASE)
+
+# Tags that usually carry page data, with their base relevance score
+_SIGNAL_TAGS = {
+    'title': 3, 'h1': 3, 'h2': 2, 'h3': 1, 'time': 2, 'meta': 1, 'article': 1, 'p': 1,
+    'label': 1, 'th': 1, 'td': 1, 'dt': 1, 'dd': 1, 'input': 1, 'select': 1, 'textarea': 1
+}
+
+
+def _cache_key(*parts: str) -> str:
+    """SHA-256 over length-prefixed parts, so no two part sequences share a key"""
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part.encode('utf-8')
+        digest.update(len(data).to_bytes(8, 'big'))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def _template_fingerprint(html_content: str) -> str:
+    """
+    Hash of a page's markup skeleton: tag names with their id/class attributes
+    
+    Text and all other attributes are ignored, so pages rendered from the same
+    template share a fingerprint while their data differs.
+    
+    Args:
+        html_content: Raw HTML content
+    
+    Returns:
+        Hex SHA-256 fingerprint
+    """
+    if '<script' in html_content:
+        html_content = _SCRIPT_RE.sub('', html_content)
+    if '<style' in html_content:
+        html_content = _STYLE_RE.sub('', html_content)
+    
+    digest = hashlib.sha256()
+    for tag, attrs in _OPEN_TAG_RE.findall(html_content):
+        token = tag.lower()
+        if attrs:
+            token += ''.join(f" {name.lower()}={value}" for name, value in _ID_CLASS_RE.findall(attrs))
+        digest.update(token.encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
 class LLMExtractor:
     """
     LLM-based extractor for bootstrap extraction
     Analyzes page structure and generates reusable extraction configs
     """
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o-mini"):
+    # Bump when prompts change so cached responses for old prompts are not reused
+    PROMPT_VERSION = "1"
+    
+    # Number of elements kept when oversized HTML is reduced to its most relevant parts
+    DOM_FILTER_TOP_K = 50
+    
+    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o-mini",
+                 cache_dir: Optional[Union[str, Path]] = None, max_prompt_tokens: int = 3000):
+        """
+        Args:
+            api_key: OpenAI API key (defaults to OPENAI_API_KEY)
+            model: Chat model used for analysis
+            cache_dir: Directory for the LLM response cache; caching is disabled if None
+            max_prompt_tokens: Token budget for the HTML of one analysis prompt (needs tiktoken)
+        """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         self.model = model
+        self.max_prompt_tokens = max_prompt_tokens
         self.client = None
+        self.cache = LLMCache(cache_dir) if cache_dir else None
+        
+        # Template fingerprint key -> config generated for pages with that template
+        self._template_configs = {}
         
         if self.api_key and openai:
             try:
@@ -40,6 +139,68 @@ class LLMExtractor:
         else:
             logger.warning("No OpenAI API key provided. LLM extraction disabled.")
     
+    @cached_property
+    def _encoding(self):
+        """Tokenizer of the model, or None to size prompts by characters"""
+        if not tiktoken:
+            return None
+        
+        try:
+            try:
+                return tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                return tiktoken.get_encoding('o200k_base')
+        except Exception as e:
+            # Encodings are downloaded on first use
+            logger.warning(f"Failed to load tokenizer for {self.model}, sizing prompts by characters: {e}")
+            return None
+    
+    def _cache_lookup(self, key: str, validate: bool = True) -> Optional[Dict[str, Any]]:
+        """Return a cached response, evicting entries that no longer validate"""
+        if not self.cache:
+            return None
+        
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
+        
+        if validate and not self.validate_extraction_config(cached):
+            logger.info(f"Discarding invalid cached LLM response {key}")
+            self.cache.delete(key)
+            return None
+        
+        logger.info("Using cached LLM response")
+        return cached
+    
+    def _cache_store(self, key: str, result: Dict[str, Any]):
+        """Cache a successfully parsed response along with the model and time it was produced"""
+        if not self.cache or result.get('error'):
+            return
+        
+        self.cache.set(key, {
+            **result,
+            'cache_info': {
+                'model': self.model,
+                'prompt_version': self.PROMPT_VERSION,
+                'cached_at': datetime.now(timezone.utc).isoformat()
+            }
+        })
+    
+    def _template_key(self, html_pages: List[str], target_fields: List[str]) -> str:
+        """Key of the configs generated for these page templates and fields"""
+        fingerprints = sorted({_template_fingerprint(page) for page in html_pages})
+        return _cache_key(self.model, self.PROMPT_VERSION, str(len(fingerprints)), *fingerprints, *target_fields)
+    
+    def _remember_template(self, template_key: str, result: Dict[str, Any]):
+        """Keep a private copy of a usable config for reuse on pages with the same template"""
+        if result.get('selectors') and not result.get('error'):
+            self._template_configs[template_key] = copy.deepcopy(result)
+    
+    def _reuse_template(self, template_key: str) -> Optional[Dict[str, Any]]:
+        """Copy of the config remembered for a template, or None; callers may modify it freely"""
+        template_config = self._template_configs.get(template_key)
+        return copy.deepcopy(template_config) if template_config is not None else None
+    
     def analyze_page_structure(self, html_content: str, target_fields: List[str] = None) -> Dict[str, Any]:
         """
         Analyze HTML page structure and generate extraction config
@@ -51,15 +212,36 @@ class LLMExtractor:
         Returns:
             Dictionary containing extraction config and metadata
         """
-        if not self.client:
-            raise ValueError("OpenAI client not initialized. Please provide valid API key.")
-        
         # Default target fields if none provided
         if not target_fields:
             target_fields = ['title', 'summary', 'date', 'content', 'author']
         
+        # Pages sharing an already analyzed template reuse its config without any LLM call
+        template_key = self._template_key([html_content], target_fields)
+        template_config = self._reuse_template(template_key)
+        if template_config is not None:
+            logger.info("Reusing extraction config of a previously analyzed page with the same template")
+            return {
+                **template_config,
+                'metadata': {
+                    **template_config.get('metadata', {}),
+                    'html_length': len(html_content),
+                    'extraction_method': 'template_reuse'
+                }
+            }
+        
         # Process HTML content
-        processed_html = self._preprocess_html(html_content)
+        processed_html = self._preprocess_html(html_content, target_fields=target_fields,
+                                               max_tokens=self.max_prompt_tokens)
+        
+        cache_key = _cache_key(self.model, self.PROMPT_VERSION, processed_html, *target_fields)
+        cached = self._cache_lookup(cache_key)
+        if cached is not None:
+            self._remember_template(template_key, cached)
+            return cached
+        
+        if not self.client:
+            raise ValueError("OpenAI client not initialized. Please provide valid API key.")
         
         # Create analysis prompt
         prompt = self._create_analysis_prompt(processed_html, target_fields)
@@ -67,24 +249,7 @@ class LLMExtractor:
         try:
             logger.info("Sending page structure analysis request to LLM...")
             
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert web scraping analyst. Your job is to analyze HTML structure and create precise BeautifulSoup extraction rules."
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
-                temperature=0.1,  # Low temperature for consistent results
-                max_tokens=2000
-            )
-            
-            # Parse response
-            result = self._parse_llm_response(response.choices[0].message.content)
+            result = self._call_llm(self._structure_request(prompt))
             
             # Add metadata
             result['metadata'] = {
@@ -96,59 +261,461 @@ class LLMExtractor:
             }
             
             logger.info(f"Successfully generated extraction config for {len(result['selectors'])} fields")
+            self._cache_store(cache_key, result)
+            self._remember_template(template_key, result)
             return result
             
         except Exception as e:
             logger.error(f"LLM analysis failed: {e}")
             raise
     
-    def _preprocess_html(self, html_content: str, max_length: int = 8000) -> str:
+    def analyze_pages_batch(self, html_pages: List[str], target_fields: List[str] = None,
+                            batch_size: int = 3) -> Dict[str, Any]:
+        """
+        Analyze several example pages in a single LLM request per batch
+        
+        Args:
+            html_pages: Raw HTML content of the example pages
+            target_fields: List of fields to extract
+            batch_size: Maximum number of pages sent in one request
+            
+        Returns:
+            Dictionary containing one merged extraction config and metadata
+        """
+        if not html_pages:
+            raise ValueError("At least one HTML page is required")
+        
+        # Default target fields if none provided
+        if not target_fields:
+            target_fields = ['title', 'summary', 'date', 'content', 'author']
+        
+        if len(html_pages) <= batch_size:
+            batches = [html_pages]
+        else:
+            batches = self._group_similar_pages(html_pages, batch_size)
+        
+        configs = [self._analyze_batch(batch, target_fields) for batch in batches]
+        result = configs[0] if len(configs) == 1 else self._merge_configs(configs)
+        
+        # Add metadata
+        result['metadata'] = {
+            'model': self.model,
+            'target_fields': target_fields,
+            'pages_analyzed': len(html_pages),
+            'llm_requests': len(batches),
+            'html_length': sum(len(page) for page in html_pages),
+            'extraction_method': 'llm_bootstrap'
+        }
+        
+        logger.info(f"Successfully generated extraction config for {len(result['selectors'])} fields "
+                    f"from {len(html_pages)} pages in {len(batches)} request(s)")
+        return result
+    
+    def _analyze_batch(self, html_pages: List[str], target_fields: List[str]) -> Dict[str, Any]:
+        """
+        Send one batch of pages to the LLM and parse the merged config
+        
+        Args:
+            html_pages: Raw HTML content of the pages in the batch
+            target_fields: Fields to extract
+            
+        Returns:
+            Parsed configuration dictionary
+        """
+        template_key = self._template_key(html_pages, target_fields)
+        template_config = self._reuse_template(template_key)
+        if template_config is not None:
+            logger.info("Reusing extraction config of previously analyzed pages with the same templates")
+            return template_config
+        
+        prompt = self._batch_prompt(html_pages, target_fields)
+        
+        cache_key = _cache_key(self.model, self.PROMPT_VERSION, prompt)
+        cached = self._cache_lookup(cache_key)
+        if cached is not None:
+            self._remember_template(template_key, cached)
+            return cached
+        
+        if not self.client:
+            raise ValueError("OpenAI client not initialized. Please provide valid API key.")
+        
+        try:
+            logger.info(f"Sending batched structure analysis request for {len(html_pages)} pages to LLM...")
+            
+            result = self._call_llm(self._structure_request(prompt))
+            self._cache_store(cache_key, result)
+            self._remember_template(template_key, result)
+            return result
+            
+        except Exception as e:
+            logger.error(f"Batched LLM analysis failed: {e}")
+            raise
+    
+    def _batch_prompt(self, html_pages: List[str], target_fields: List[str]) -> str:
+        """Build the structure analysis prompt for a batch of pages"""
+        # Share the prompt budget between the pages of the batch
+        max_length = max(2000, 8000 // len(html_pages))
+        max_tokens = max(750, self.max_prompt_tokens // len(html_pages))
+        sections = [
+            f"=== PAGE {i + 1} ===\n"
+            f"{self._preprocess_html(page, max_length=max_length, target_fields=target_fields, max_tokens=max_tokens)}"
+            for i, page in enumerate(html_pages)
+        ]
+        return self._create_analysis_prompt("\n\n".join(sections), target_fields, page_count=len(html_pages))
+    
+    def _structure_request(self, prompt: str) -> Dict[str, Any]:
+        """Chat completion parameters for a structure analysis prompt"""
+        return {
+            'model': self.model,
+            'messages': [
+                {
+                    "role": "system",
+                    "content": "You are an expert web scraping analyst. Your job is to analyze HTML structure and create precise BeautifulSoup extraction rules."
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            'temperature': 0.1,  # Low temperature for consistent results
+            'max_tokens': 2000,
+            'response_format': {"type": "json_object"}  # Guarantees a bare JSON object
+        }
+    
+    def analyze_pages_offline(self, page_groups: List[List[str]], target_fields: List[str] = None,
+                              poll_interval: float = 60.0,
+                              timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Analyze many page groups through the OpenAI Batch API
+        
+        Batch requests cost half as much and do not count against the synchronous
+        rate limits, but complete within a 24h window. Use for bulk re-analysis, not
+        for bootstrapping a crawl that is waiting on the config.
+        
+        Args:
+            page_groups: Groups of raw HTML pages, each analyzed like one analyze_pages_batch batch
+            target_fields: List of fields to extract
+            poll_interval: Seconds between batch status checks
+            timeout: Maximum seconds to wait for the batch (None waits for the completion window)
+            
+        Returns:
+            One parsed configuration dictionary per page group, in input order
+        """
+        if not target_fields:
+            target_fields = ['title', 'summary', 'date', 'content', 'author']
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(page_groups)
+        cache_keys = {}
+        lines = []
+        
+        for i, pages in enumerate(page_groups):
+            prompt = self._batch_prompt(pages, target_fields)
+            cache_key = _cache_key(self.model, self.PROMPT_VERSION, prompt)
+            cached = self._cache_lookup(cache_key)
+            if cached is not None:
+                results[i] = cached
+                continue
+            
+            cache_keys[str(i)] = cache_key
+            lines.append(json.dumps({
+                'custom_id': str(i),
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': self._structure_request(prompt)
+            }, ensure_ascii=False))
+        
+        if not lines:
+            return results
+        
+        if not self.client:
+            raise ValueError("OpenAI client not initialized. Please provide valid API key.")
+        
+        batch_file = self.client.files.create(
+            file=('structure_analysis.jsonl', '\n'.join(lines).encode('utf-8')),
+            purpose='batch'
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint='/v1/chat/completions',
+            completion_window='24h'
+        )
+        logger.info(f"Submitted batch {batch.id} with {len(lines)} structure analysis requests")
+        
+        started = time.monotonic()
+        while batch.status not in ('completed', 'failed', 'expired', 'cancelled'):
+            if timeout is not None and time.monotonic() - started > timeout:
+                raise TimeoutError(f"Batch {batch.id} did not complete within {timeout}s (status: {batch.status})")
+            time.sleep(poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+        
+        if batch.status != 'completed':
+            raise RuntimeError(f"Batch {batch.id} ended with status: {batch.status}")
+        
+        output = self.client.files.content(batch.output_file_id).text if batch.output_file_id else ''
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            
+            record = _json_loads(line)
+            custom_id = record['custom_id']
+            response = record.get('response') or {}
+            if record.get('error') or response.get('status_code') != 200:
+                logger.error(f"Batch request {custom_id} failed: {record.get('error') or response.get('body')}")
+                continue
+            
+            result = self._parse_llm_response(response['body']['choices'][0]['message']['content'])
+            self._cache_store(cache_keys[custom_id], result)
+            results[int(custom_id)] = result
+        
+        # Requests without output failed or expired inside the batch
+        for custom_id in cache_keys:
+            if results[int(custom_id)] is None:
+                results[int(custom_id)] = {
+                    'selectors': {},
+                    'confidence_scores': {},
+                    'fallback_selectors': {},
+                    'notes': 'Batch request failed',
+                    'error': f"No output for request {custom_id} in batch {batch.id}"
+                }
+        
+        logger.info(f"Batch {batch.id} completed: {len(lines)} requests")
+        return results
+    
+    @staticmethod
+    def _structure_signature(html_content: str) -> set:
+        """Set of tag/class tokens used to compare page layouts"""
+        return set(_TAG_CLASS_RE.findall(html_content))
+    
+    def _group_similar_pages(self, html_pages: List[str], batch_size: int) -> List[List[str]]:
+        """
+        Group pages with similar layouts into batches
+        
+        Args:
+            html_pages: Raw HTML content
+            batch_size: Maximum pages per batch
+            
+        Returns:
+            List of page batches
+        """
+        signatures = [self._structure_signature(page) for page in html_pages]
+        remaining = list(range(len(html_pages)))
+        batches = []
+        
+        while remaining:
+            seed = remaining.pop(0)
+            
+            def similarity(i: int) -> float:
+                union = signatures[seed] | signatures[i]
+                return len(signatures[seed] & signatures[i]) / len(union) if union else 1.0
+            
+            members = sorted(remaining, key=similarity, reverse=True)[:batch_size - 1]
+            for i in members:
+                remaining.remove(i)
+            
+            batches.append([html_pages[seed]] + [html_pages[i] for i in members])
+        
+        return batches
+    
+    @staticmethod
+    def _merge_configs(configs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Merge configs from several batches, keeping the most confident selector per field
+        
+        Args:
+            configs: Parsed configuration dictionaries
+            
+        Returns:
+            Merged configuration dictionary
+        """
+        merged = {
+            'selectors': {},
+            'confidence_scores': {},
+            'fallback_selectors': {},
+            'notes': ' '.join(c.get('notes', '') for c in configs if c.get('notes'))
+        }
+        
+        for config in configs:
+            for field, selector in config.get('selectors', {}).items():
+                confidence = config.get('confidence_scores', {}).get(field, 0)
+                if field not in merged['selectors'] or confidence > merged['confidence_scores'].get(field, 0):
+                    merged['selectors'][field] = selector
+                    merged['confidence_scores'][field] = confidence
+            
+            for field, fallbacks in config.get('fallback_selectors', {}).items():
+                existing = merged['fallback_selectors'].setdefault(field, [])
+                existing.extend(f for f in fallbacks if f not in existing)
+        
+        return merged
+    
+    def _preprocess_html(self, html_content: str, max_length: int = 8000,
+                         target_fields: Optional[List[str]] = None,
+                         max_tokens: Optional[int] = None) -> str:
         """
         Preprocess HTML content for LLM analysis
         
         Args:
             html_content: Raw HTML
-            max_length: Maximum length to send to LLM
+            max_length: Maximum length to send to LLM, used when no tokenizer is available
+            target_fields: Fields being extracted, used to rank elements of oversized pages
+            max_tokens: Maximum number of tokens to send to LLM; overrides max_length with tiktoken
             
         Returns:
             Processed HTML string
         """
         # Remove script and style tags
-        html_clean = re.sub(r'<script[^>]*>.*?</script>', '', html_content, flags=re.DOTALL)
-        html_clean = re.sub(r'<style[^>]*>.*?</style>', '', html_clean, flags=re.DOTALL)
+        # Substring checks are far cheaper than a DOTALL scan that finds nothing
+        html_clean = _SCRIPT_RE.sub('', html_content) if '<script' in html_content else html_content
+        if '<style' in html_clean:
+            html_clean = _STYLE_RE.sub('', html_clean)
         
         # Remove excessive whitespace
-        html_clean = re.sub(r'\s+', ' ', html_clean)
+        html_clean = _WS_RE.sub(' ', html_clean)
+        
+        if max_tokens and self._encoding is not None:
+            return self._truncate_to_tokens(html_clean, max_tokens, target_fields)
         
         # Truncate if too long
         if len(html_clean) > max_length:
-            # Try to find a good truncation point
-            truncated = html_clean[:max_length]
+            html_clean = self._truncate_html(html_clean, max_length, target_fields)
+        
+        return html_clean
+    
+    def _truncate_html(self, html_clean: str, max_length: int, target_fields: Optional[List[str]]) -> str:
+        """Shorten cleaned HTML to about max_length characters"""
+        # Prefer the most relevant elements over whatever happens to come first
+        filtered = self._filter_relevant_elements(html_clean, target_fields, max_length)
+        if filtered:
+            return filtered + "\n<!-- ... remaining content omitted for analysis ... -->"
+        
+        # Try to find a good truncation point
+        truncated = html_clean[:max_length]
+        
+        # Find the last complete tag
+        last_tag = truncated.rfind('>')
+        if last_tag > max_length * 0.8:  # If we have a reasonable tag ending
+            truncated = truncated[:last_tag + 1]
+        
+        return truncated + "\n<!-- ... content truncated for analysis ... -->"
+    
+    def _truncate_to_tokens(self, html_clean: str, max_tokens: int, target_fields: Optional[List[str]]) -> str:
+        """Shorten cleaned HTML to at most max_tokens tokens of the model's tokenizer"""
+        tokens = self._encoding.encode(html_clean, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return html_clean
+        
+        # Size the character budget by this page's own characters-per-token ratio
+        max_length = max_tokens * len(html_clean) // len(tokens)
+        truncated = self._truncate_html(html_clean, max_length, target_fields)
+        
+        tokens = self._encoding.encode(truncated, disallowed_special=())
+        if len(tokens) > max_tokens:
+            truncated = self._encoding.decode(tokens[:max_tokens])
             
-            # Find the last complete tag
+            # Cut back to the last complete tag
             last_tag = truncated.rfind('>')
-            if last_tag > max_length * 0.8:  # If we have a reasonable tag ending
+            if last_tag > 0:
                 truncated = truncated[:last_tag + 1]
+        
+        return truncated
+    
+    def _filter_relevant_elements(self, html_content: str, target_fields: Optional[List[str]],
+                                  max_length: int) -> Optional[str]:
+        """
+        Reduce HTML to the top-scoring elements, kept in document order
+        
+        Elements score for being a data-bearing tag and for class/id/name attributes
+        matching words of the target field names.
+        
+        Args:
+            html_content: Cleaned HTML
+            target_fields: Fields being extracted
+            max_length: Maximum length of the returned HTML
+        
+        Returns:
+            Filtered HTML, or None if lxml is unavailable or nothing relevant was found
+        """
+        if lxml_html is None:
+            return None
+        
+        try:
+            root = lxml_html.fromstring(html_content)
+        except Exception as e:
+            logger.debug(f"DOM filter could not parse HTML: {e}")
+            return None
+        
+        field_tokens = {
+            token for field in target_fields or []
+            for token in _FIELD_TOKEN_RE.findall(field.lower()) if len(token) > 2
+        }
+        
+        scored = []
+        for position, element in enumerate(root.iter()):
+            if not isinstance(element.tag, str):  # comments and processing instructions
+                continue
             
-            html_clean = truncated + "\n<!-- ... content truncated for analysis ... -->"
+            if element.get('type') == 'hidden':
+                continue
+            
+            score = _SIGNAL_TAGS.get(element.tag, 0)
+            if score and (element.text or element.get('value') or element.get('content') or '').strip():
+                score += 1
+            if field_tokens:
+                attrs = ' '.join(
+                    element.get(name, '') for name in ('id', 'class', 'name', 'itemprop', 'property')
+                ).lower()
+                if attrs and field_tokens.intersection(_FIELD_TOKEN_RE.findall(attrs)):
+                    score += 2
+            
+            if score:
+                scored.append((score, position, element))
         
-        return html_clean
+        if not scored:
+            return None
+        
+        top = sorted(scored, key=lambda item: (-item[0], item[1]))[:self.DOM_FILTER_TOP_K]
+        top.sort(key=lambda item: item[1])
+        
+        parts = []
+        kept = set()
+        length = 0
+        for _, _, element in top:
+            # Skip elements already serialized as part of a kept ancestor
+            if any(ancestor in kept for ancestor in element.iterancestors()):
+                continue
+            
+            fragment = lxml_html.tostring(element, encoding='unicode', with_tail=False)
+            if length + len(fragment) > max_length:
+                continue
+            
+            kept.add(element)
+            parts.append(fragment)
+            length += len(fragment)
+        
+        return '\n'.join(parts) or None
     
-    def _create_analysis_prompt(self, html_content: str, target_fields: List[str]) -> str:
+    def _create_analysis_prompt(self, html_content: str, target_fields: List[str], page_count: int = 1) -> str:
         """
         Create the analysis prompt for LLM
         
         Args:
             html_content: Processed HTML content
             target_fields: Fields to extract
+            page_count: Number of pages in html_content, delimited by "=== PAGE n ===" lines
             
         Returns:
             Formatted prompt string
         """
         fields_str = ', '.join(target_fields)
         
+        if page_count > 1:
+            intro = (f"Analyze these {page_count} HTML pages of the same kind (each starts with an \"=== PAGE n ===\" line) "
+                     f"and return ONE merged BeautifulSoup-style Python extraction config that works on all of them "
+                     f"to get the following fields: {fields_str}")
+        else:
+            intro = f"Analyze this HTML page and return a BeautifulSoup-style Python extraction config to get the following fields: {fields_str}"
+        
         prompt = f"""
-Analyze this HTML page and return a BeautifulSoup-style Python extraction config to get the following fields: {fields_str}
+{intro}
 
 HTML Content:
 {html_content}
@@ -184,6 +751,80 @@ Return only the JSON object, no additional text.
 """
         return prompt
     
+    def _call_llm(self, request: Dict[str, Any], max_retries: int = 2,
+                  validate: bool = True) -> Dict[str, Any]:
+        """
+        Run a chat completion, sending parse and validation errors back to the model
+        
+        Args:
+            request: Chat completion parameters (see _structure_request)
+            max_retries: Additional attempts after an unusable response
+            validate: Whether the response must be a valid extraction config
+            
+        Returns:
+            Parsed response, or a fallback config carrying the error if every attempt failed
+        """
+        messages = list(request['messages'])
+        
+        for attempt in range(max_retries + 1):
+            response = self.client.chat.completions.create(**{**request, 'messages': messages})
+            content = response.choices[0].message.content or ''
+            
+            try:
+                result = self._decode_llm_json(content)
+                if not isinstance(result, dict):
+                    error = "Response must be a JSON object"
+                else:
+                    error = self._config_error(result) if validate else None
+            except json.JSONDecodeError as e:
+                error = f"Invalid JSON: {e}"
+            
+            if error is None:
+                return self._with_required_keys(result)
+            
+            if attempt < max_retries:
+                logger.warning(f"Unusable LLM response (attempt {attempt + 1} of {max_retries + 1}): {error}")
+                messages += [
+                    {"role": "assistant", "content": content},
+                    {"role": "user", "content": f"Your output had error: {error}. Fix and retry returning only the JSON."}
+                ]
+                time.sleep(1.0 * (attempt + 1))
+        
+        logger.error(f"LLM response still unusable after {max_retries + 1} attempts: {error}")
+        return self._fallback_config('Failed to parse LLM response', error)
+    
+    @staticmethod
+    def _decode_llm_json(response: str) -> Any:
+        """Decode the JSON in an LLM response, raising json.JSONDecodeError if there is none"""
+        try:
+            # Requests use JSON mode, so the response is normally the object itself
+            return _json_loads(response)
+        except json.JSONDecodeError:
+            # Extract JSON from responses wrapped in prose or code fences
+            json_match = _JSON_OBJECT_RE.search(response)
+            if not json_match:
+                raise
+            return _json_loads(json_match.group())
+    
+    @staticmethod
+    def _with_required_keys(config: Dict[str, Any]) -> Dict[str, Any]:
+        """Add empty sections for required config keys the response left out"""
+        for key in ('selectors', 'confidence_scores', 'fallback_selectors'):
+            if key not in config:
+                config[key] = {}
+        return config
+    
+    @staticmethod
+    def _fallback_config(notes: str, error: str) -> Dict[str, Any]:
+        """Empty config returned when no usable response was obtained"""
+        return {
+            'selectors': {},
+            'confidence_scores': {},
+            'fallback_selectors': {},
+            'notes': notes,
+            'error': error
+        }
+    
     def _parse_llm_response(self, response: str) -> Dict[str, Any]:
         """
         Parse LLM response and extract JSON config
@@ -195,34 +836,29 @@ Return only the JSON object, no additional text.
             Parsed configuration dictionary
         """
         try:
-            # Extract JSON from response
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                config = json.loads(json_match.group())
-            else:
-                # Try to parse the entire response as JSON
-                config = json.loads(response)
+            config = self._decode_llm_json(response)
             
             # Validate config structure
-            required_keys = ['selectors', 'confidence_scores', 'fallback_selectors']
-            for key in required_keys:
-                if key not in config:
-                    config[key] = {}
-            
-            return config
+            return self._with_required_keys(config)
             
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse LLM response as JSON: {e}")
             logger.error(f"Response: {response}")
             
             # Return fallback config
-            return {
-                'selectors': {},
-                'confidence_scores': {},
-                'fallback_selectors': {},
-                'notes': 'Failed to parse LLM response',
-                'error': str(e)
-            }
+            return self._fallback_config('Failed to parse LLM response', str(e))
+    
+    @staticmethod
+    def _config_error(config: Dict[str, Any]) -> Optional[str]:
+        """Describe what makes an extraction config invalid, or None if it is valid"""
+        for key in ('selectors', 'confidence_scores', 'fallback_selectors'):
+            if key not in config:
+                return f"Missing required key: {key}"
+        
+        if not isinstance(config['selectors'], dict):
+            return "Selectors must be a dictionary"
+        
+        return None
     
     def validate_extraction_config(self, config: Dict[str, Any]) -> bool:
         """
@@ -234,15 +870,9 @@ Return only the JSON object, no additional text.
         Returns:
             True if valid, False otherwise
         """
-        required_keys = ['selectors', 'confidence_scores', 'fallback_selectors']
-        
-        for key in required_keys:
-            if key not in config:
-                logger.error(f"Missing required key: {key}")
-                return False
-        
-        if not isinstance(config['selectors'], dict):
-            logger.error("Selectors must be a dictionary")
+        error = self._config_error(config)
+        if error:
+            logger.error(error)
             return False
         
         return True
@@ -261,13 +891,15 @@ Return only the JSON object, no additional text.
         if not self.client or len(example_pages) < 2:
             return config
         
-        # Analyze multiple pages to improve selectors
-        enhanced_selectors = {}
+        # Analyze all fields across the pages in one request
+        fields = list(config['selectors'].keys())
+        analysis = self._analyze_all_fields_across_pages(fields, example_pages)
         
-        for field in config['selectors'].keys():
-            field_selectors = self._analyze_field_across_pages(field, example_pages)
-            if field_selectors:
-                enhanced_selectors[field] = field_selectors
+        enhanced_selectors = {
+            field: analysis[field]
+            for field in fields
+            if isinstance(analysis.get(field), dict) and analysis[field]
+        }
         
         if enhanced_selectors:
             config['enhanced_selectors'] = enhanced_selectors
@@ -275,56 +907,67 @@ Return only the JSON object, no additional text.
         
         return config
     
-    def _analyze_field_across_pages(self, field: str, pages: List[str]) -> Dict[str, Any]:
+    def _analyze_all_fields_across_pages(self, fields: List[str], pages: List[str]) -> Dict[str, Any]:
         """
-        Analyze a specific field across multiple pages
+        Analyze several fields across multiple pages in a single LLM request
         
         Args:
-            field: Field name to analyze
+            fields: Field names to analyze
             pages: List of HTML content
             
         Returns:
-            Analysis results for the field
+            Analysis results keyed by field name
         """
-        if len(pages) < 2:
+        if len(pages) < 2 or not fields:
             return {}
         
-        # Create a focused prompt for this field
+        fields_str = ', '.join(f"'{field}'" for field in fields)
+        
+        # Embed the pages once and ask about every field
         prompt = f"""
-Analyze these {len(pages)} HTML pages and find the most reliable CSS selector for extracting the '{field}' field.
+Analyze these {min(len(pages), 3)} HTML pages and find the most reliable CSS selector for extracting each of these fields: {fields_str}.
 
 Pages:
 """
         
         for i, page in enumerate(pages[:3]):  # Limit to 3 pages for analysis
-            processed = self._preprocess_html(page, max_length=3000)
+            processed = self._preprocess_html(page, max_length=3000, target_fields=fields,
+                                              max_tokens=self.max_prompt_tokens // 3)
             prompt += f"\nPage {i+1}:\n{processed}\n"
         
+        example_field = fields[0]
         prompt += f"""
-Find the most consistent and reliable CSS selector for '{field}' across all pages.
-Return a JSON object with:
+For every field, find the most consistent and reliable CSS selector across all pages.
+Return a JSON object keyed by field name, with one entry per field:
 {{
-    "primary_selector": "best.css.selector",
-    "confidence": 0.95,
-    "alternatives": ["alt1", "alt2"],
-    "reasoning": "Why this selector is most reliable"
+    "{example_field}": {{
+        "primary_selector": "best.css.selector",
+        "confidence": 0.95,
+        "alternatives": ["alt1", "alt2"],
+        "reasoning": "Why this selector is most reliable"
+    }}
 }}
 """
         
+        cache_key = _cache_key(self.model, self.PROMPT_VERSION, prompt)
+        cached = self._cache_lookup(cache_key, validate=False)
+        if cached is not None:
+            return cached
+        
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
+            result = self._call_llm({
+                'model': self.model,
+                'messages': [
                     {"role": "system", "content": "You are a web scraping expert analyzing HTML structure consistency."},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.1,
-                max_tokens=500
-            )
-            
-            result = self._parse_llm_response(response.choices[0].message.content)
+                'temperature': 0.1,
+                'max_tokens': min(4000, 500 * len(fields)),
+                'response_format': {"type": "json_object"}
+            }, validate=False)
+            self._cache_store(cache_key, result)
             return result
             
         except Exception as e:
-            logger.error(f"Failed to analyze field '{field}' across pages: {e}")
-            return {} 
\ No newline at end of file
+            logger.error(f"Failed to analyze fields {fields} across pages: {e}")
+            return {}
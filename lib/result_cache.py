@@ -0,0 +1,273 @@
+"""
+Result Cache Module
+SQLite-backed LRU cache of per-URL extraction results
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple, Union
+from pathlib import Path
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps(value: Dict[str, Any]) -> bytes:
+    if orjson:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False).encode('utf-8')
+
+
+def _loads(data: bytes) -> Dict[str, Any]:
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class ResultCache:
+    """
+    Disk cache of extraction results keyed by URL and configuration name
+    Entries expire after a TTL and the least recently used entries are evicted beyond max_entries
+    """
+    
+    def __init__(self, db_path: Union[str, Path] = "lib/configs/.result_cache.sqlite",
+                 ttl: Optional[float] = 24 * 3600, max_entries: int = 100000,
+                 min_success_rate: float = 0.5):
+        """
+        Args:
+            db_path: SQLite database file
+            ttl: Seconds before an entry expires (None for no expiry)
+            max_entries: Maximum number of cached results
+            min_success_rate: Only results with at least this extraction success rate are cached
+        """
+        self.db_path = Path(db_path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.min_success_rate = min_success_rate
+        
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, config_name TEXT NOT NULL, value BLOB NOT NULL, "
+            "stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_config ON results (config_name)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_accessed ON results (accessed_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS validated_results ("
+            "key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, value BLOB NOT NULL, "
+            "accessed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+    
+    @staticmethod
+    def make_key(url: str, config_name: str) -> str:
+        """
+        Build the cache key for a URL extracted with a configuration
+        
+        Args:
+            url: Page URL
+            config_name: Configuration name
+        
+        Returns:
+            Hex SHA-256 cache key
+        """
+        return hashlib.sha256(f"{url}\0{config_name}".encode('utf-8')).hexdigest()
+    
+    def get(self, url: str, config_name: str,
+            config_fingerprint: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached extraction result
+        
+        Args:
+            url: Page URL
+            config_name: Configuration name
+            config_fingerprint: Hash of the config's rules; results from other rules are misses
+        
+        Returns:
+            Cached result or None on miss/expiry
+        """
+        key = self.make_key(url, config_fingerprint or config_name)
+        now = time.time()
+        
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value, stored_at FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                
+                if row is None:
+                    return None
+                
+                if self.ttl is not None and now - row[1] > self.ttl:
+                    self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                    self._conn.commit()
+                    return None
+                
+                self._conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+            
+            return _loads(row[0])
+        
+        except Exception as e:
+            logger.warning(f"Failed to read cached result for {url}: {e}")
+            return None
+    
+    def set(self, url: str, config_name: str, result: Dict[str, Any],
+            config_fingerprint: Optional[str] = None) -> bool:
+        """
+        Cache an extraction result if it passes the admission policy
+        
+        Args:
+            url: Page URL
+            config_name: Configuration name (used by invalidate)
+            result: Extraction result
+            config_fingerprint: Hash of the config's rules the result was extracted with
+        
+        Returns:
+            True if the result was cached
+        """
+        if result.get('error'):
+            return False
+        
+        success_rate = result.get('extraction_metadata', {}).get('success_rate', 0)
+        if success_rate < self.min_success_rate:
+            return False
+        
+        key = self.make_key(url, config_fingerprint or config_name)
+        now = time.time()
+        
+        try:
+            value = _dumps(result)
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO results (key, config_name, value, stored_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, config_name, value, now, now)
+                )
+                self._evict()
+                self._conn.commit()
+            return True
+        
+        except Exception as e:
+            logger.warning(f"Failed to cache result for {url}: {e}")
+            return False
+    
+    def _evict(self):
+        """Drop the least recently used entries beyond max_entries (caller holds the lock)"""
+        count = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM results WHERE key IN "
+                "(SELECT key FROM results ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,)
+            )
+    
+    def get_validated(self, key: str) -> Optional[Tuple[Optional[str], Optional[str], Dict[str, Any]]]:
+        """
+        Get a result stored with its HTTP validators
+        
+        Args:
+            key: Cache key (see make_key)
+        
+        Returns:
+            Tuple of (etag, last_modified, result) or None on miss
+        """
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT etag, last_modified, value FROM validated_results WHERE key = ?", (key,)
+                ).fetchone()
+                
+                if row is None:
+                    return None
+                
+                self._conn.execute(
+                    "UPDATE validated_results SET accessed_at = ? WHERE key = ?", (time.time(), key)
+                )
+                self._conn.commit()
+            
+            return row[0], row[1], _loads(row[2])
+        
+        except Exception as e:
+            logger.warning(f"Failed to read validated result {key}: {e}")
+            return None
+    
+    def set_validated(self, key: str, etag: Optional[str], last_modified: Optional[str],
+                      result: Dict[str, Any]) -> bool:
+        """
+        Store a result with the HTTP validators needed to revalidate it
+        
+        No TTL applies: entries are only reused after the server confirms the page is unchanged.
+        
+        Args:
+            key: Cache key (see make_key)
+            etag: ETag response header
+            last_modified: Last-Modified response header
+            result: Extraction result
+        
+        Returns:
+            True if the result was cached
+        """
+        if result.get('error') or not (etag or last_modified):
+            return False
+        
+        try:
+            value = _dumps(result)
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO validated_results (key, etag, last_modified, value, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, etag, last_modified, value, time.time())
+                )
+                count = self._conn.execute("SELECT COUNT(*) FROM validated_results").fetchone()[0]
+                if count > self.max_entries:
+                    self._conn.execute(
+                        "DELETE FROM validated_results WHERE key IN "
+                        "(SELECT key FROM validated_results ORDER BY accessed_at LIMIT ?)",
+                        (count - self.max_entries,)
+                    )
+                self._conn.commit()
+            return True
+        
+        except Exception as e:
+            logger.warning(f"Failed to store validated result {key}: {e}")
+            return False
+    
+    def invalidate(self, config_name: str) -> int:
+        """
+        Remove all cached results for a configuration
+        
+        Args:
+            config_name: Configuration name
+        
+        Returns:
+            Number of removed entries
+        """
+        try:
+            with self._lock:
+                cursor = self._conn.execute("DELETE FROM results WHERE config_name = ?", (config_name,))
+                self._conn.commit()
+            
+            if cursor.rowcount:
+                logger.info(f"Invalidated {cursor.rowcount} cached results for config: {config_name}")
+            return cursor.rowcount
+        
+        except Exception as e:
+            logger.warning(f"Failed to invalidate cached results for {config_name}: {e}")
+            return 0
+    
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
@@ -3,50 +3,622 @@ Rule Parser Module
 Phase 2: Scalable crawling with rule-based parsing using generated configs
 """
 
+import os
 import re
 import json
-from typing import Dict, List, Any, Optional, Union
+import hashlib
+import asyncio
+import concurrent.futures
+from contextlib import nullcontext
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Union, Iterable, Iterator, AsyncIterator
 from pathlib import Path
 import logging
 
 try:
-    from bs4 import BeautifulSoup
+    from bs4 import BeautifulSoup, UnicodeDammit
     import requests
 except ImportError:
     logger.error("BeautifulSoup and requests required for rule parsing")
     BeautifulSoup = None
+    UnicodeDammit = None
     requests = None
 
 logger = logging.getLogger(__name__)
 
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml
+except ImportError:
+    lxml = None
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # HTTP/2 support for httpx
+except ImportError:
+    h2 = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
+# Whether the asyncio/aiohttp crawling path is available
+HAS_AIOHTTP = aiohttp is not None
+
+# Transport errors raised by the synchronous HTTP clients
+HTTP_ERRORS = tuple(
+    error for error in (
+        requests.RequestException if requests else None,
+        httpx.HTTPError if httpx else None
+    ) if error
+)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    # requests and aiohttp only decode brotli bodies when the brotli package is installed
+    'Accept-Encoding': 'gzip, deflate, br' if brotli else 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+# Charsets the parsers decode correctly from raw bytes
+_PASSTHROUGH_CHARSETS = frozenset({'utf-8', 'utf8', 'ascii', 'us-ascii'})
+
+# <meta charset="..."> / <meta http-equiv="Content-Type" content="...; charset=..."> in the document head
+_META_CHARSET_RE = re.compile(rb'<meta[^>]*?charset\s*=\s*["\']?\s*([\w:.-]+)', re.IGNORECASE)
+
+
+def _decode_body(body: bytes, content_type: str) -> Union[str, bytes]:
+    """
+    Prepare a response body for parsing without a redundant decode
+    
+    Bodies are passed to the parser as bytes unless the Content-Type header
+    declares a non-UTF-8 charset. BeautifulSoup sniffs the encoding of bytes;
+    the Lexbor path decodes them first (see _decode_html_bytes).
+    
+    Args:
+        body: Raw response body
+        content_type: Content-Type response header
+    
+    Returns:
+        Bytes, or text decoded with the declared charset
+    """
+    charset = content_type.partition('charset=')[2].split(';')[0].strip().strip('"\'').lower()
+    if not charset or charset in _PASSTHROUGH_CHARSETS:
+        return body
+    
+    try:
+        return body.decode(charset, errors='replace')
+    except LookupError:
+        return body
+
+
+def _decode_html_bytes(body: bytes) -> str:
+    """
+    Decode an HTML body for Lexbor, which assumes UTF-8 and ignores <meta charset>
+    
+    Args:
+        body: Raw HTML bytes without a usable Content-Type charset
+    
+    Returns:
+        Decoded text
+    """
+    # Valid UTF-8 is almost never anything else, and it is the common case
+    try:
+        return body.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        pass
+    
+    if UnicodeDammit:
+        markup = UnicodeDammit(body, is_html=True).unicode_markup
+        if markup is not None:
+            return markup
+    
+    match = _META_CHARSET_RE.search(body, 0, 4096)
+    if match:
+        try:
+            return body.decode(match.group(1).decode('ascii'), errors='replace')
+        except LookupError:
+            pass
+    
+    return body.decode('windows-1252', errors='replace')
+
+
+@lru_cache(maxsize=512)
+def _compile_validator(pattern: str):
+    """
+    Compile a validation pattern once, preferring RE2 for linear-time matching
+    on untrusted crawled content. Patterns RE2 rejects fall back to Python's re.
+    """
+    if re2:
+        try:
+            return re2.compile(pattern)
+        except Exception:
+            logger.debug(f"RE2 cannot compile '{pattern}', falling back to re")
+    return re.compile(pattern)
+
+
+# Names available to selector code; 'soup' is bound per page
+_SELECTOR_NAMES = {
+    're': re,
+    'str': str,
+    'int': int,
+    'float': float,
+    'list': list,
+    'dict': dict
+}
+
+
+@lru_cache(maxsize=1024)
+def _compile_selector_code(selector_code: str):
+    """Compile a selector expression once; configs reuse the same strings on every page"""
+    return compile(selector_code, '<selector>', 'eval')
+
+
+# Selector code of the form soup.select_one('css') followed by simple accessors
+_SELECT_ONE_RE = re.compile(r"""\s*soup\.select_one\(\s*(?P<q>['"])(?P<css>.*?)(?P=q)\s*\)""")
+_SELECTOR_OPS = (
+    (re.compile(r"\.text\b"), 'text'),
+    (re.compile(r"\.string\b"), 'string'),
+    (re.compile(r"\.get_text\(\s*(?:strip\s*=\s*(?P<arg>True|False)\s*)?\)"), 'get_text'),
+    (re.compile(r"\.strip\(\s*\)"), 'strip'),
+    (re.compile(r"""\.get\(\s*(?P<q>['"])(?P<arg>[^'"\\]*)(?P=q)\s*\)"""), 'get'),
+    (re.compile(r"""\[\s*(?P<q>['"])(?P<arg>[^'"\\]*)(?P=q)\s*\]"""), 'item'),
+)
+
+
+@lru_cache(maxsize=1024)
+def _parse_selector_code(selector_code: str) -> Optional[tuple]:
+    """
+    Parse selector code like "soup.select_one('h1.title').text.strip()" into (css, ops)
+    
+    Cached at module level, so parsers built from the same config (reloads,
+    process pool workers) share one parse per selector string.
+    
+    Args:
+        selector_code: Selector code string
+        
+    Returns:
+        Tuple of (CSS selector, tuple of (op, arg) accessors), or None if the
+        expression is not a plain select_one chain and has to be evaluated
+    """
+    match = _SELECT_ONE_RE.match(selector_code)
+    if not match or '\\' in match.group('css'):
+        return None
+    
+    code = selector_code.rstrip()
+    pos = match.end()
+    ops = []
+    
+    while pos < len(code):
+        for pattern, op in _SELECTOR_OPS:
+            op_match = pattern.match(code, pos)
+            if op_match:
+                break
+        else:
+            return None
+        
+        arg = op_match.groupdict().get('arg')
+        if op == 'get_text':
+            arg = arg == 'True'
+        ops.append((op, arg))
+        pos = op_match.end()
+    
+    return match.group('css'), tuple(ops)
+
+
+# Bare tag, class and id selectors, answered from a per-page index on the BeautifulSoup backends
+_SIMPLE_SELECTOR_RE = re.compile(r'^(?P<kind>[.#]?)(?P<name>[-_a-zA-Z0-9]+)$')
+
+# Memo key of the per-page DOM index; cannot collide with a CSS selector
+_DOM_INDEX_KEY = '\0dom-index'
+
+
+def _index_dom(soup) -> tuple:
+    """
+    Index a BeautifulSoup tree by tag name, class and id in one pass
+    
+    Args:
+        soup: BeautifulSoup object
+    
+    Returns:
+        Tuple of (tags, classes, ids) dictionaries mapping names to the first matching element
+    """
+    tags, classes, ids = {}, {}, {}
+    for element in soup.find_all(True):
+        tags.setdefault(element.name, element)
+        for class_name in element.get('class') or ():
+            classes.setdefault(class_name, element)
+        element_id = element.get('id')
+        if element_id:
+            ids.setdefault(element_id, element)
+    return tags, classes, ids
+
+
+def _query_first(root, css: str, queries: Optional[Dict[str, Any]], lexbor: bool = False) -> Any:
+    """
+    First match of a CSS selector, memoized per page
+    
+    Args:
+        root: selectolax node or BeautifulSoup object of the page
+        css: CSS selector
+        queries: Per-page memo of selector results, or None to skip memoization
+        lexbor: Whether root is a selectolax node
+    
+    Returns:
+        Matching node or None
+    """
+    if queries is not None and css in queries:
+        return queries[css]
+    
+    simple = None if lexbor or queries is None else _SIMPLE_SELECTOR_RE.match(css)
+    if lexbor:
+        node = root.css_first(css)
+    elif simple and not (simple.group('kind') == '' and simple.group('name')[0].isdigit()):
+        # soupsieve walks the whole tree per query; one indexing pass serves every simple selector
+        index = queries.get(_DOM_INDEX_KEY)
+        if index is None:
+            index = queries[_DOM_INDEX_KEY] = _index_dom(root)
+        tags, classes, ids = index
+        kind, name = simple.group('kind'), simple.group('name')
+        if kind == '.':
+            node = classes.get(name)
+        elif kind == '#':
+            node = ids.get(name)
+        else:
+            node = tags.get(name.lower())
+    else:
+        node = root.select_one(css)
+    if queries is not None:
+        queries[css] = node
+    return node
+
+
+def _run_compiled_selector(soup, compiled: tuple, queries: Optional[Dict[str, Any]] = None) -> Any:
+    """Apply a parsed select_one chain; a missing element anywhere in the chain yields None"""
+    if isinstance(soup, _LexborElement):
+        return _run_compiled_lexbor(soup._node, compiled, queries)
+    
+    css, ops = compiled
+    value = _query_first(soup, css, queries)
+    
+    for op, arg in ops:
+        if value is None:
+            return None
+        if op == 'text':
+            value = value.get_text()
+        elif op == 'string':
+            value = value.string
+        elif op == 'get_text':
+            value = value.get_text(strip=arg)
+        elif op == 'strip':
+            value = value.strip()
+        elif op == 'get':
+            value = value.get(arg)
+        else:
+            value = value[arg]
+    
+    return value
+
+
+def _run_compiled_lexbor(tree, compiled: tuple, queries: Optional[Dict[str, Any]] = None) -> Any:
+    """Apply a parsed select_one chain straight on selectolax nodes, skipping the BeautifulSoup shim"""
+    css, ops = compiled
+    value = _query_first(tree, css, queries, lexbor=True)
+    is_node = True
+    
+    for op, arg in ops:
+        if value is None:
+            return None
+        if op == 'strip':
+            value = value.strip()
+            continue
+        if not is_node:
+            # Attribute access on a string: mirror what BeautifulSoup code would hit
+            raise AttributeError(f"'str' object has no attribute '{op}'")
+        if op == 'text':
+            value = value.text(deep=True) or ''
+        elif op == 'get_text':
+            value = value.text(deep=True, strip=arg) or ''
+        elif op == 'string':
+            value = _LexborElement(value).string
+        elif op == 'get':
+            value = (value.attributes or {}).get(arg)
+        else:
+            value = (value.attributes or {})[arg]
+        is_node = False
+    
+    return value
+
+
+def _dumps_line(result: Dict[str, Any]) -> bytes:
+    """Serialize one result as a compact JSON line"""
+    if orjson:
+        return orjson.dumps(result) + b"\n"
+    return json.dumps(result, ensure_ascii=False).encode('utf-8') + b"\n"
+
+
+def config_fingerprint(config: Dict[str, Any]) -> str:
+    """Stable SHA-256 of an extraction config, independent of key order"""
+    if orjson:
+        payload = orjson.dumps(config, option=orjson.OPT_SORT_KEYS)
+    else:
+        payload = json.dumps(config, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()
+
+
+class NDJSONWriter:
+    """
+    Writes extraction results to a newline-delimited JSON file as they arrive,
+    so a crawl never has to hold every result in memory
+    """
+    
+    def __init__(self, output_path: Union[str, Path]):
+        self.output_path = Path(output_path)
+        self._file = None
+    
+    def __enter__(self) -> 'NDJSONWriter':
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.output_path, 'wb')
+        return self
+    
+    def write(self, result: Dict[str, Any]):
+        self._file.write(_dumps_line(result))
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._file.close()
+        self._file = None
+
+
+class ExtractionStatsAccumulator:
+    """
+    Running extraction statistics, fed one result at a time
+    Produces the same dictionary as RuleParser.get_extraction_stats
+    """
+    
+    def __init__(self):
+        self.total_pages = 0
+        self.successful_pages = 0
+        self.success_rate_sum = 0.0
+        self.total_errors = 0
+        
+        # field -> [successful, total]; expanded to dictionaries only in summary()
+        self.field_counts = {}
+        
+        # Results that carry extracted fields, and the number of fields across them
+        self.pages_with_fields = 0
+        self.total_fields = 0
+    
+    def add(self, result: Dict[str, Any]):
+        """Add one extraction result"""
+        metadata = result.get('extraction_metadata', {})
+        success_rate = metadata.get('success_rate', 0)
+        
+        self.total_pages += 1
+        self.success_rate_sum += success_rate
+        if success_rate > 0:
+            self.successful_pages += 1
+        self.total_errors += len(metadata.get('errors', []))
+        
+        fields = result.get('extracted_fields', {})
+        if fields:
+            self.pages_with_fields += 1
+            self.total_fields += len(fields)
+        
+        field_counts = self.field_counts
+        for field, field_data in fields.items():
+            counts = field_counts.get(field)
+            if counts is None:
+                counts = field_counts[field] = [0, 0]
+            
+            counts[1] += 1
+            if field_data.get('value'):
+                counts[0] += 1
+    
+    def summary(self) -> Dict[str, Any]:
+        """Statistics dictionary for everything added so far"""
+        if not self.total_pages:
+            return {}
+        
+        # Calculate field success rates
+        field_stats = {
+            field: {
+                'successful': successful,
+                'total': total,
+                'success_rate': successful / total if total > 0 else 0
+            }
+            for field, (successful, total) in self.field_counts.items()
+        }
+        
+        return {
+            'total_pages': self.total_pages,
+            'successful_pages': self.successful_pages,
+            'page_success_rate': self.successful_pages / self.total_pages,
+            'avg_extraction_success_rate': self.success_rate_sum / self.total_pages,
+            'total_errors': self.total_errors,
+            'field_statistics': field_stats,
+            'fields_extracted': list(field_stats)
+        }
+
+
+# Supported HTML parser backends
+PARSERS = ('lexbor', 'lxml', 'bs4')
+
+
+def default_parser() -> str:
+    """Fastest available parser backend: selectolax/Lexbor, then BeautifulSoup+lxml, then html.parser"""
+    if LexborHTMLParser:
+        return 'lexbor'
+    if BeautifulSoup and lxml:
+        return 'lxml'
+    return 'bs4'
+
+
+class _LexborElement:
+    """
+    Minimal BeautifulSoup-compatible view of a selectolax (Lexbor) node
+    Lets generated selector code such as "soup.select_one('h1').text.strip()" run on the Lexbor backend
+    """
+    
+    __slots__ = ('_node',)
+    
+    def __init__(self, node):
+        self._node = node
+    
+    def select_one(self, selector: str) -> Optional['_LexborElement']:
+        node = self._node.css_first(selector)
+        return _LexborElement(node) if node is not None else None
+    
+    def select(self, selector: str) -> List['_LexborElement']:
+        return [_LexborElement(node) for node in self._node.css(selector)]
+    
+    def find(self, name: str = None, attrs: Dict[str, str] = None, class_: str = None,
+             id: str = None) -> Optional['_LexborElement']:
+        return self.select_one(self._to_css(name, attrs, class_, id))
+    
+    def find_all(self, name: str = None, attrs: Dict[str, str] = None, class_: str = None,
+                 id: str = None) -> List['_LexborElement']:
+        return self.select(self._to_css(name, attrs, class_, id))
+    
+    @staticmethod
+    def _to_css(name: str = None, attrs: Dict[str, str] = None, class_: str = None, id: str = None) -> str:
+        """Translate BeautifulSoup find() arguments into a CSS selector"""
+        selector = name or ''
+        if class_:
+            selector += ''.join(f'.{c}' for c in class_.split())
+        if id:
+            selector += f'#{id}'
+        for key, value in (attrs or {}).items():
+            selector += f'[{key}="{value}"]'
+        return selector or '*'
+    
+    @property
+    def text(self) -> str:
+        return self._node.text(deep=True) or ''
+    
+    def get_text(self, separator: str = '', strip: bool = False) -> str:
+        return self._node.text(deep=True, separator=separator, strip=strip) or ''
+    
+    @property
+    def string(self) -> Optional[str]:
+        # Like BeautifulSoup: the text of an element with exactly one (text or element) child
+        child = getattr(self._node, 'child', None)
+        if child is None or child.next is not None:
+            return None
+        if child.tag == '-text':
+            return child.text()
+        return _LexborElement(child).string
+    
+    @property
+    def name(self) -> Optional[str]:
+        return getattr(self._node, 'tag', None)
+    
+    @property
+    def attrs(self) -> Dict[str, Any]:
+        return dict(getattr(self._node, 'attributes', None) or {})
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.attrs.get(key, default)
+    
+    def __getitem__(self, key: str) -> Any:
+        return self.attrs[key]
+    
+    def __str__(self) -> str:
+        return self._node.html or ''
+
+
 class RuleParser:
     """
     Rule-based parser for scalable web crawling
     Uses generated extraction configs to parse pages efficiently
     """
     
-    def __init__(self, config: Dict[str, Any] = None):
+    # Batches at least this large extract in worker processes; smaller ones stay on threads
+    PROCESS_POOL_MIN_PAGES = 200
+    
+    def __init__(self, config: Dict[str, Any] = None, parser: Optional[str] = None):
+        """
+        Args:
+            config: Extraction configuration
+            parser: HTML parser backend ('lexbor', 'lxml' or 'bs4'); defaults to the fastest available
+        """
+        if parser is not None and parser not in PARSERS:
+            raise ValueError(f"Unknown parser '{parser}', expected one of {PARSERS}")
+        
         self.config = config or {}
+        self._prepare_config()
+        self.parser = parser or default_parser()
         self.session = None
         self._setup_session()
     
     def _setup_session(self):
-        """Setup requests session with proper headers"""
-        if requests:
+        """
+        Setup the HTTP session with proper headers
+        
+        Prefers an httpx client, which multiplexes requests to the same origin over a
+        single HTTP/2 connection when h2 is installed, and falls back to requests.
+        """
+        if httpx:
+            # Connection is a hop-by-hop header and is not allowed on HTTP/2
+            headers = {name: value for name, value in DEFAULT_HEADERS.items() if name != 'Connection'}
+            self.session = httpx.Client(
+                http2=h2 is not None,
+                headers=headers,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+            )
+        elif requests:
             self.session = requests.Session()
-            self.session.headers.update({
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Accept-Encoding': 'gzip, deflate',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            })
+            self.session.headers.update(DEFAULT_HEADERS)
     
     def load_config(self, config: Dict[str, Any]):
         """Load extraction configuration"""
         self.config = config
-        logger.info(f"Loaded extraction config with {len(config.get('selectors', {}))} fields")
+        self._prepare_config()
+        logger.info(f"Loaded extraction config with {len(self._selector_keys)} fields")
+    
+    def _prepare_config(self):
+        """Precompute the config lookups used for every page, once per loaded config"""
+        self.config_fingerprint = config_fingerprint(self.config)
+        self._selectors = tuple(self.config.get('selectors', {}).items())
+        self._selector_keys = tuple(field for field, _ in self._selectors)
+        for _, code in self._selectors:
+            _parse_selector_code(code)  # warm the module-level parse cache
+        self._fallbacks = self.config.get('fallback_selectors') or {}
+        self._has_fallbacks = bool(self._fallbacks)
+        self._confidence = self.config.get('confidence_scores', {})
     
     def load_config_from_file(self, config_path: Union[str, Path]):
         """Load extraction configuration from JSON file"""
@@ -54,57 +626,59 @@ class RuleParser:
         if not config_path.exists():
             raise FileNotFoundError(f"Config file not found: {config_path}")
         
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
+        if orjson:
+            config = orjson.loads(config_path.read_bytes())
+        else:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
         
         self.load_config(config)
     
-    def extract_from_html(self, html_content: str, url: str = None) -> Dict[str, Any]:
+    def extract_from_html(self, html_content: Union[str, bytes], url: str = None) -> Dict[str, Any]:
         """
         Extract data from HTML content using loaded config
         
         Args:
-            html_content: Raw HTML content
+            html_content: Raw HTML content, as text or undecoded bytes
             url: Source URL (for metadata)
             
         Returns:
             Extracted data dictionary
         """
-        if not BeautifulSoup:
-            raise ImportError("BeautifulSoup is required for HTML parsing")
-        
-        if not self.config.get('selectors'):
+        if not self._selectors:
             raise ValueError("No extraction config loaded")
         
         # Parse HTML
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = self._parse_html(html_content)
         
         # Extract data
         extracted_data = {
             'url': url,
             'extracted_fields': {},
             'extraction_metadata': {
-                'config_used': list(self.config.get('selectors', {}).keys()),
+                'config_used': list(self._selector_keys),
                 'success_rate': 0,
                 'errors': []
             }
         }
         
-        selectors = self.config.get('selectors', {})
-        fallback_selectors = self.config.get('fallback_selectors', {})
-        confidence_scores = self.config.get('confidence_scores', {})
+        fallback_selectors = self._fallbacks
+        confidence_scores = self._confidence
+        
+        # Selectors shared between fields and fallbacks only traverse the tree once per page
+        queries = {}
         
         successful_extractions = 0
-        total_fields = len(selectors)
+        total_fields = len(self._selectors)
         
-        for field, selector_code in selectors.items():
+        for field, selector_code in self._selectors:
             try:
                 # Extract using primary selector
-                value = self._execute_selector(soup, selector_code, field)
+                value = self._execute_selector(soup, selector_code, field, queries)
                 
                 # If primary selector fails, try fallback selectors
-                if not value and field in fallback_selectors:
-                    value = self._try_fallback_selectors(soup, fallback_selectors[field], field)
+                if not value and self._has_fallbacks and field in fallback_selectors:
+                    value = self._try_fallback_selectors(soup, fallback_selectors[field], field, queries)
                 
                 extracted_data['extracted_fields'][field] = {
                     'value': value,
@@ -133,7 +707,35 @@ class RuleParser:
         
         return extracted_data
     
-    def _execute_selector(self, soup: BeautifulSoup, selector_code: str, field: str) -> Optional[str]:
+    def _parse_html(self, html_content: Union[str, bytes]):
+        """
+        Parse HTML with the configured backend
+        
+        Args:
+            html_content: Raw HTML content
+            
+        Returns:
+            BeautifulSoup object, or a BeautifulSoup-compatible view of a Lexbor tree
+        """
+        if self.parser == 'lexbor':
+            if not LexborHTMLParser:
+                raise ImportError("selectolax is required for the 'lexbor' parser")
+            if isinstance(html_content, bytes):
+                html_content = _decode_html_bytes(html_content)
+            return _LexborElement(LexborHTMLParser(html_content))
+        
+        if not BeautifulSoup:
+            raise ImportError("BeautifulSoup is required for HTML parsing")
+        
+        if self.parser == 'lxml':
+            if not lxml:
+                raise ImportError("lxml is required for the 'lxml' parser")
+            return BeautifulSoup(html_content, 'lxml')
+        
+        return BeautifulSoup(html_content, 'html.parser')
+    
+    def _execute_selector(self, soup: BeautifulSoup, selector_code: str, field: str,
+                          queries: Optional[Dict[str, Any]] = None) -> Optional[str]:
         """
         Execute a selector code string on BeautifulSoup object
         
@@ -141,24 +743,22 @@ class RuleParser:
             soup: BeautifulSoup object
             selector_code: Selector code string (e.g., "soup.select_one('h1.title').text.strip()")
             field: Field name for error reporting
+            queries: Per-page memo of CSS query results
             
         Returns:
             Extracted value or None
         """
         try:
-            # Create a safe execution environment
-            safe_dict = {
-                'soup': soup,
-                're': re,
-                'str': str,
-                'int': int,
-                'float': float,
-                'list': list,
-                'dict': dict
-            }
-            
-            # Execute the selector code
-            result = eval(selector_code, {"__builtins__": {}}, safe_dict)
+            compiled = _parse_selector_code(selector_code)
+            if compiled:
+                # Plain select_one chains run directly, without eval
+                result = _run_compiled_selector(soup, compiled, queries)
+            else:
+                # Create a safe execution environment
+                safe_dict = dict(_SELECTOR_NAMES, soup=soup)
+                
+                # Execute the selector code
+                result = eval(_compile_selector_code(selector_code), {"__builtins__": {}}, safe_dict)
             
             # Clean and validate result
             if result is not None:
@@ -174,7 +774,8 @@ class RuleParser:
             logger.debug(f"Selector execution failed for {field}: {e}")
             return None
     
-    def _try_fallback_selectors(self, soup: BeautifulSoup, fallback_selectors: List[str], field: str) -> Optional[str]:
+    def _try_fallback_selectors(self, soup: BeautifulSoup, fallback_selectors: List[str], field: str,
+                                queries: Optional[Dict[str, Any]] = None) -> Optional[str]:
         """
         Try fallback selectors if primary selector fails
         
@@ -182,24 +783,65 @@ class RuleParser:
             soup: BeautifulSoup object
             fallback_selectors: List of fallback CSS selectors
             field: Field name for error reporting
+            queries: Per-page memo of CSS query results
             
         Returns:
             Extracted value or None
         """
+        # Query selectolax nodes directly when parsing with Lexbor
+        lexbor_tree = soup._node if isinstance(soup, _LexborElement) else None
+        
         for selector in fallback_selectors:
             try:
-                element = soup.select_one(selector)
-                if element:
-                    value = element.get_text(strip=True)
-                    if value:
-                        logger.debug(f"Fallback selector '{selector}' succeeded for {field}")
-                        return value
+                if lexbor_tree is not None:
+                    node = _query_first(lexbor_tree, selector, queries, lexbor=True)
+                    value = node.text(deep=True, strip=True) if node is not None else None
+                else:
+                    element = _query_first(soup, selector, queries)
+                    if element is None:
+                        value = None
+                    else:
+                        # A lone text child avoids get_text's walk over every descendant string
+                        string = element.string
+                        value = string.strip() if string is not None else element.get_text(strip=True)
+                
+                if value:
+                    logger.debug(f"Fallback selector '{selector}' succeeded for {field}")
+                    return value
             except Exception as e:
                 logger.debug(f"Fallback selector '{selector}' failed for {field}: {e}")
                 continue
         
         return None
     
+    def fetch_html(self, url: str, timeout: int = 30) -> str:
+        """
+        Fetch the raw HTML of a page without running extraction
+        
+        Args:
+            url: URL to fetch
+            timeout: Request timeout in seconds
+            
+        Returns:
+            HTML content
+        """
+        if not self.session:
+            raise ImportError("httpx or requests is required for web crawling")
+        
+        response = self.session.get(url, timeout=timeout)
+        response.raise_for_status()
+        return response.text
+    
+    def _fetch_page(self, url: str, timeout: int = 30) -> tuple:
+        """Fetch a page, returning (body, status_code, content_type, encoding) with the body ready for parsing"""
+        if not self.session:
+            raise ImportError("httpx or requests is required for web crawling")
+        
+        response = self.session.get(url, timeout=timeout)
+        response.raise_for_status()
+        content_type = response.headers.get('content-type', '')
+        return _decode_body(response.content, content_type), response.status_code, content_type, response.encoding
+    
     def crawl_page(self, url: str, timeout: int = 30) -> Dict[str, Any]:
         """
         Crawl a single page and extract data
@@ -211,39 +853,82 @@ class RuleParser:
         Returns:
             Extracted data dictionary
         """
-        if not requests or not self.session:
-            raise ImportError("Requests is required for web crawling")
+        # Without validators the server never answers 304, so a result is always returned
+        return self.crawl_page_conditional(url, timeout=timeout)
+    
+    def crawl_page_conditional(self, url: str, etag: Optional[str] = None,
+                               last_modified: Optional[str] = None,
+                               timeout: int = 30) -> Optional[Dict[str, Any]]:
+        """
+        Crawl a single page with a conditional GET
+        
+        Args:
+            url: URL to crawl
+            etag: ETag from a previous response, sent as If-None-Match
+            last_modified: Last-Modified from a previous response, sent as If-Modified-Since
+            timeout: Request timeout in seconds
+            
+        Returns:
+            Extracted data dictionary, or None if the server reports the page unchanged (304)
+        """
+        if not self.session:
+            raise ImportError("httpx or requests is required for web crawling")
+        
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
         
         try:
             logger.info(f"Crawling page: {url}")
             
-            response = self.session.get(url, timeout=timeout)
+            response = self.session.get(url, headers=headers, timeout=timeout)
+            if response.status_code == 304:
+                logger.info(f"Page not modified: {url}")
+                return None
             response.raise_for_status()
             
-            # Extract data
-            extracted_data = self.extract_from_html(response.text, url)
+            content_type = response.headers.get('content-type', '')
+            result = self._build_page_result(
+                _decode_body(response.content, content_type), url, response.status_code,
+                content_type, response.encoding
+            )
+            result['response_metadata']['etag'] = response.headers.get('ETag')
+            result['response_metadata']['last_modified'] = response.headers.get('Last-Modified')
+            return result
             
-            # Add response metadata
-            extracted_data['response_metadata'] = {
-                'status_code': response.status_code,
-                'content_length': len(response.text),
-                'content_type': response.headers.get('content-type', ''),
-                'encoding': response.encoding
-            }
-            
-            return extracted_data
-            
-        except requests.RequestException as e:
+        except HTTP_ERRORS as e:
             logger.error(f"Failed to crawl {url}: {e}")
-            return {
-                'url': url,
-                'error': str(e),
-                'extracted_fields': {},
-                'extraction_metadata': {
-                    'success_rate': 0,
-                    'errors': [f"Request failed: {e}"]
-                }
+            return self._failed_result(url, e, f"Request failed: {e}")
+    
+    def _build_page_result(self, html_content: Union[str, bytes], url: str, status_code: int,
+                           content_type: str, encoding: Optional[str]) -> Dict[str, Any]:
+        """Run extraction on a fetched page and attach response metadata"""
+        extracted_data = self.extract_from_html(html_content, url)
+        
+        # Add response metadata
+        extracted_data['response_metadata'] = {
+            'status_code': status_code,
+            'content_length': len(html_content),
+            'content_type': content_type,
+            'encoding': encoding
+        }
+        
+        return extracted_data
+    
+    @staticmethod
+    def _failed_result(url: str, error: Exception, message: str) -> Dict[str, Any]:
+        """Build the result dictionary for a page that could not be crawled"""
+        return {
+            'url': url,
+            'error': str(error),
+            'extracted_fields': {},
+            'extraction_metadata': {
+                'success_rate': 0,
+                'errors': [message]
             }
+        }
     
     def crawl_multiple_pages(self, urls: List[str], max_workers: int = 5, timeout: int = 30) -> List[Dict[str, Any]]:
         """
@@ -257,9 +942,38 @@ class RuleParser:
         Returns:
             List of extracted data dictionaries
         """
-        import concurrent.futures
+        # One aiohttp session with max_workers in-flight requests beats a pool of blocking threads,
+        # but a running event loop can't be re-entered
+        if aiohttp and not self._in_event_loop():
+            return asyncio.run(self.crawl_multiple_pages_async(urls, concurrency=max_workers, timeout=timeout))
         
-        results = []
+        return list(self.iter_crawl(urls, max_workers, timeout))
+    
+    @staticmethod
+    def _in_event_loop() -> bool:
+        """Whether the caller is already running inside an asyncio event loop"""
+        try:
+            asyncio.get_running_loop()
+            return True
+        except RuntimeError:
+            return False
+    
+    def iter_crawl(self, urls: List[str], max_workers: int = 5, timeout: int = 30) -> Iterator[Dict[str, Any]]:
+        """
+        Crawl multiple pages concurrently, yielding each result as soon as it completes
+        
+        Args:
+            urls: List of URLs to crawl
+            max_workers: Maximum concurrent workers
+            timeout: Request timeout in seconds
+            
+        Yields:
+            Extracted data dictionaries in completion order
+        """
+        # Extraction is CPU-bound and holds the GIL; large batches are worth the process startup
+        if self._use_process_pool(len(urls)):
+            yield from self._iter_crawl_processes(urls, max_workers, timeout)
+            return
         
         with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
             # Submit all crawl tasks
@@ -273,21 +987,278 @@ class RuleParser:
                 url = future_to_url[future]
                 try:
                     result = future.result()
-                    results.append(result)
                     logger.info(f"Completed crawling {url}")
                 except Exception as e:
                     logger.error(f"Exception occurred while crawling {url}: {e}")
-                    results.append({
-                        'url': url,
-                        'error': str(e),
-                        'extracted_fields': {},
-                        'extraction_metadata': {
-                            'success_rate': 0,
-                            'errors': [f"Exception: {e}"]
-                        }
-                    })
-        
-        return results
+                    result = self._failed_result(url, e, f"Exception: {e}")
+                yield result
+    
+    def _iter_crawl_processes(self, urls: List[str], max_workers: int, timeout: int) -> Iterator[Dict[str, Any]]:
+        """
+        Fetch pages on a thread pool and extract them on a process pool, one process per core
+        
+        Args:
+            urls: List of URLs to crawl
+            max_workers: Maximum concurrent fetch threads
+            timeout: Request timeout in seconds
+            
+        Yields:
+            Extracted data dictionaries in completion order
+        """
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as fetch_pool, \
+                self._extract_pool() as extract_pool:
+            
+            # future -> (stage, url)
+            tasks = {fetch_pool.submit(self._fetch_page, url, timeout): ('fetch', url) for url in urls}
+            pending = set(tasks)
+            
+            while pending:
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                
+                for future in done:
+                    stage, url = tasks.pop(future)
+                    try:
+                        if stage == 'fetch':
+                            # Parsed trees cannot be pickled, so the raw HTML crosses the process boundary
+                            extract_future = extract_pool.submit(_extract_in_worker, url, *future.result())
+                            tasks[extract_future] = ('extract', url)
+                            pending.add(extract_future)
+                            continue
+                        
+                        result = future.result()
+                        logger.info(f"Completed crawling {url}")
+                    except HTTP_ERRORS as e:
+                        logger.error(f"Failed to crawl {url}: {e}")
+                        result = self._failed_result(url, e, f"Request failed: {e}")
+                    except Exception as e:
+                        logger.error(f"Exception occurred while crawling {url}: {e}")
+                        result = self._failed_result(url, e, f"Exception: {e}")
+                    yield result
+    
+    def _extract_pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        """Process pool with one extraction worker per core, each holding its own parser for this config"""
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            initializer=_init_extract_worker,
+            initargs=(self.config, self.parser)
+        )
+    
+    def _use_process_pool(self, page_count: int) -> bool:
+        """Whether a batch is large enough for process-pool extraction to pay for its startup"""
+        return page_count >= self.PROCESS_POOL_MIN_PAGES and (os.cpu_count() or 1) > 1
+    
+    async def crawl_multiple_pages_async(self, urls: List[str], concurrency: int = 300,
+                                         timeout: int = 30) -> List[Dict[str, Any]]:
+        """
+        Crawl multiple pages concurrently on a single aiohttp session
+        
+        Args:
+            urls: List of URLs to crawl
+            concurrency: Maximum number of in-flight requests
+            timeout: Request timeout in seconds
+            
+        Returns:
+            List of extracted data dictionaries, in the order of urls
+        """
+        if not aiohttp:
+            raise ImportError("aiohttp is required for async crawling")
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=8,
+                                         resolver=self._async_resolver())
+        client_timeout = aiohttp.ClientTimeout(total=timeout)
+        
+        with self._extract_pool() if self._use_process_pool(len(urls)) else nullcontext() as executor:
+            async with aiohttp.ClientSession(headers=DEFAULT_HEADERS, connector=connector,
+                                             timeout=client_timeout) as session:
+                return await asyncio.gather(
+                    *[self._crawl_page_async(session, semaphore, url, executor) for url in urls]
+                )
+    
+    async def iter_crawl_async(self, urls: List[str], concurrency: int = 300,
+                               timeout: int = 30) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Crawl multiple pages on a single aiohttp session, yielding each result as soon as it completes
+        
+        Args:
+            urls: List of URLs to crawl
+            concurrency: Maximum number of in-flight requests
+            timeout: Request timeout in seconds
+            
+        Yields:
+            Extracted data dictionaries in completion order
+        """
+        if not aiohttp:
+            raise ImportError("aiohttp is required for async crawling")
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=8,
+                                         resolver=self._async_resolver())
+        client_timeout = aiohttp.ClientTimeout(total=timeout)
+        
+        with self._extract_pool() if self._use_process_pool(len(urls)) else nullcontext() as executor:
+            async with aiohttp.ClientSession(headers=DEFAULT_HEADERS, connector=connector,
+                                             timeout=client_timeout) as session:
+                for next_result in asyncio.as_completed(
+                    [self._crawl_page_async(session, semaphore, url, executor) for url in urls]
+                ):
+                    yield await next_result
+    
+    async def pipeline_stream(self, urls: Iterable[str], concurrency: int = 300, timeout: int = 30,
+                              validation_rules: Dict[str, Any] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Fetch, parse, extract and validate each page in one pipelined stage, streaming compact results
+        
+        Each page's body goes straight from the response buffer into the parser and is
+        dropped once its fields are extracted; results carry no response metadata.
+        A bounded queue applies back-pressure when the consumer falls behind.
+        
+        Args:
+            urls: URLs to crawl
+            concurrency: Maximum number of in-flight pages (also the result queue size)
+            timeout: Request timeout in seconds
+            validation_rules: Optional validation rules applied to every result
+            
+        Yields:
+            Compact result dictionaries in completion order
+        """
+        if not aiohttp:
+            raise ImportError("aiohttp is required for async crawling")
+        
+        url_iter = iter(urls)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+        done = object()
+        
+        connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=8,
+                                         resolver=self._async_resolver())
+        client_timeout = aiohttp.ClientTimeout(total=timeout)
+        
+        async with aiohttp.ClientSession(headers=DEFAULT_HEADERS, connector=connector,
+                                         timeout=client_timeout) as session:
+            
+            async def worker():
+                try:
+                    for url in url_iter:
+                        await queue.put(await self._pipeline(session, url, validation_rules))
+                finally:
+                    await queue.put(done)
+            
+            workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+            try:
+                remaining = len(workers)
+                while remaining:
+                    result = await queue.get()
+                    if result is done:
+                        remaining -= 1
+                    else:
+                        yield result
+            finally:
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+    
+    async def _pipeline(self, session, url: str, validation_rules: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Fetch one page as bytes and extract it in a worker thread, returning a compact result"""
+        try:
+            logger.info(f"Crawling page: {url}")
+            
+            async with session.get(url) as response:
+                response.raise_for_status()
+                body = _decode_body(await response.read(), response.headers.get('content-type', ''))
+                
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Failed to crawl {url}: {e}")
+            return self._failed_result(url, e, f"Request failed: {e}")
+        except Exception as e:
+            # Anything escaping here would end the worker and silently drop the URL
+            logger.error(f"Exception occurred while crawling {url}: {e}")
+            return self._failed_result(url, e, f"Exception: {e}")
+        
+        try:
+            # run_in_executor rather than asyncio.to_thread, which needs Python 3.9
+            result = await asyncio.get_running_loop().run_in_executor(
+                None, self._extract_compact, body, url, validation_rules
+            )
+            logger.info(f"Completed crawling {url}")
+            return result
+        except Exception as e:
+            logger.error(f"Exception occurred while crawling {url}: {e}")
+            return self._failed_result(url, e, f"Exception: {e}")
+    
+    def _extract_compact(self, body: Union[str, bytes], url: str, validation_rules: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Extract and validate a page body, keeping only the fields downstream consumers need"""
+        extracted_data = self.extract_from_html(body, url)
+        metadata = extracted_data['extraction_metadata']
+        
+        result = {
+            'url': url,
+            'extracted_fields': extracted_data['extracted_fields'],
+            'extraction_metadata': {
+                'success_rate': metadata['success_rate'],
+                'errors': metadata['errors']
+            }
+        }
+        
+        if validation_rules:
+            result['validation'] = self.validate_extraction(result, validation_rules)
+        
+        return result
+    
+    @staticmethod
+    def _async_resolver():
+        """Use the aiodns resolver when available, otherwise aiohttp's default"""
+        try:
+            return aiohttp.AsyncResolver()
+        except Exception:
+            return None
+    
+    async def _crawl_page_async(self, session, semaphore: asyncio.Semaphore, url: str,
+                                executor: concurrent.futures.ProcessPoolExecutor = None) -> Dict[str, Any]:
+        """
+        Fetch one page on the shared session and extract it in a worker thread or process
+        
+        Args:
+            session: aiohttp client session
+            semaphore: Semaphore bounding in-flight requests
+            url: URL to crawl
+            executor: Process pool for extraction; a worker thread is used if None
+            
+        Returns:
+            Extracted data dictionary
+        """
+        async with semaphore:
+            try:
+                logger.info(f"Crawling page: {url}")
+                
+                async with session.get(url) as response:
+                    response.raise_for_status()
+                    status_code = response.status
+                    content_type = response.headers.get('content-type', '')
+                    encoding = response.charset
+                    html_content = _decode_body(await response.read(), content_type)
+                    
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.error(f"Failed to crawl {url}: {e}")
+                return self._failed_result(url, e, f"Request failed: {e}")
+            except Exception as e:
+                logger.error(f"Exception occurred while crawling {url}: {e}")
+                return self._failed_result(url, e, f"Exception: {e}")
+        
+        # Parsing is CPU-bound, keep it off the event loop
+        try:
+            if executor:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    executor, _extract_in_worker, url, html_content, status_code, content_type, encoding
+                )
+            else:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    None, self._build_page_result, html_content, url, status_code, content_type, encoding
+                )
+            logger.info(f"Completed crawling {url}")
+            return result
+        except Exception as e:
+            logger.error(f"Exception occurred while crawling {url}: {e}")
+            return self._failed_result(url, e, f"Exception: {e}")
     
     def validate_extraction(self, extracted_data: Dict[str, Any], validation_rules: Dict[str, Any] = None) -> Dict[str, Any]:
         """
@@ -335,7 +1306,7 @@ class RuleParser:
             
             # Check pattern matching
             if 'pattern' in rules and value:
-                if not re.search(rules['pattern'], value):
+                if not _compile_validator(rules['pattern']).search(value):
                     validation_results['errors'].append(f"Field '{field}' doesn't match required pattern")
                     validation_results['valid'] = False
         
@@ -348,91 +1319,107 @@ class RuleParser:
         Args:
             results: List of extraction results
             output_path: Output file path
-            format: Output format ('json' or 'csv')
+            format: Output format ('json', 'ndjson' or 'csv')
         """
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
         if format.lower() == 'json':
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(results, f, indent=2, ensure_ascii=False)
+            if orjson:
+                with open(output_path, 'wb') as f:
+                    f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            else:
+                with open(output_path, 'w', encoding='utf-8') as f:
+                    json.dump(results, f, indent=2, ensure_ascii=False)
+        
+        elif format.lower() == 'ndjson':
+            with NDJSONWriter(output_path) as writer:
+                for result in results:
+                    writer.write(result)
         
         elif format.lower() == 'csv':
-            import csv
-            
-            # Flatten results for CSV
-            flattened_results = []
-            for result in results:
-                flat_row = {
-                    'url': result.get('url', ''),
-                    'success_rate': result.get('extraction_metadata', {}).get('success_rate', 0)
-                }
-                
-                # Add extracted fields
-                for field, field_data in result.get('extracted_fields', {}).items():
-                    flat_row[field] = field_data.get('value', '')
-                    flat_row[f'{field}_confidence'] = field_data.get('confidence', 0)
-                
-                flattened_results.append(flat_row)
-            
-            if flattened_results:
-                with open(output_path, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.DictWriter(f, fieldnames=flattened_results[0].keys())
-                    writer.writeheader()
-                    writer.writerows(flattened_results)
+            if results:
+                self._write_csv(self._csv_columns(results), output_path)
         
         logger.info(f"Results saved to: {output_path}")
     
-    def get_extraction_stats(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    @staticmethod
+    def _csv_columns(results: List[Dict[str, Any]]) -> Dict[str, list]:
         """
-        Generate statistics from extraction results
+        Flatten results into CSV columns in a single pass
         
         Args:
             results: List of extraction results
             
         Returns:
-            Statistics dictionary
+            Column name -> values, with None where a result lacks the field
         """
-        if not results:
-            return {}
+        columns = {'url': [], 'success_rate': []}
         
-        total_pages = len(results)
-        successful_pages = sum(1 for r in results if r.get('extraction_metadata', {}).get('success_rate', 0) > 0)
+        for row, result in enumerate(results):
+            columns['url'].append(result.get('url', ''))
+            columns['success_rate'].append(result.get('extraction_metadata', {}).get('success_rate', 0))
+            
+            # Add extracted fields
+            for field, field_data in result.get('extracted_fields', {}).items():
+                for name, value in ((field, field_data.get('value', '')),
+                                    (f'{field}_confidence', field_data.get('confidence', 0))):
+                    column = columns.get(name)
+                    if column is None:
+                        column = columns[name] = [None] * row
+                    column.append(value)
+            
+            for column in columns.values():
+                if len(column) <= row:
+                    column.append(None)
         
-        # Calculate average success rate
-        success_rates = [r.get('extraction_metadata', {}).get('success_rate', 0) for r in results]
-        avg_success_rate = sum(success_rates) / len(success_rates) if success_rates else 0
+        return columns
+    
+    @staticmethod
+    def _write_csv(columns: Dict[str, list], output_path: Path):
+        """Write CSV columns with pyarrow when available, otherwise with the csv module"""
+        if pa:
+            try:
+                pa_csv.write_csv(pa.Table.from_pydict(columns), str(output_path))
+                return
+            except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                logger.warning(f"pyarrow CSV export failed, falling back to csv module: {e}")
         
-        # Count errors
-        total_errors = sum(len(r.get('extraction_metadata', {}).get('errors', [])) for r in results)
+        import csv
         
-        # Field extraction statistics
-        field_stats = {}
-        all_fields = set()
+        with open(output_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows(zip(*columns.values()))
+    
+    def get_extraction_stats(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Generate statistics from extraction results
         
-        for result in results:
-            fields = result.get('extracted_fields', {})
-            all_fields.update(fields.keys())
+        Args:
+            results: List of extraction results
             
-            for field, field_data in fields.items():
-                if field not in field_stats:
-                    field_stats[field] = {'successful': 0, 'total': 0}
-                
-                field_stats[field]['total'] += 1
-                if field_data.get('value'):
-                    field_stats[field]['successful'] += 1
-        
-        # Calculate field success rates
-        for field in field_stats:
-            stats = field_stats[field]
-            stats['success_rate'] = stats['successful'] / stats['total'] if stats['total'] > 0 else 0
+        Returns:
+            Statistics dictionary
+        """
+        accumulator = ExtractionStatsAccumulator()
+        for result in results:
+            accumulator.add(result)
         
-        return {
-            'total_pages': total_pages,
-            'successful_pages': successful_pages,
-            'page_success_rate': successful_pages / total_pages if total_pages > 0 else 0,
-            'avg_extraction_success_rate': avg_success_rate,
-            'total_errors': total_errors,
-            'field_statistics': field_stats,
-            'fields_extracted': list(all_fields)
-        } 
\ No newline at end of file
+        return accumulator.summary()
+
+
+# Per-process parser used by RuleParser._iter_crawl_processes
+_worker_parser = None
+
+
+def _init_extract_worker(config: Dict[str, Any], parser: str):
+    """Process pool initializer: build the worker's parser once from the shared config"""
+    global _worker_parser
+    _worker_parser = RuleParser(config, parser=parser)
+
+
+def _extract_in_worker(url: str, html_content: Union[str, bytes], status_code: int,
+                       content_type: str, encoding: Optional[str]) -> Dict[str, Any]:
+    """Run extraction for one fetched page inside a worker process"""
+    return _worker_parser._build_page_result(html_content, url, status_code, content_type, encoding)
@@ -3,14 +3,304 @@ Utilities Module
 Helper functions for HTML processing and text cleaning
 """
 
+import copy
 import re
 import html
+from functools import lru_cache
+from html.parser import HTMLParser
 from typing import List, Dict, Any, Optional
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode
 import logging
 
 logger = logging.getLogger(__name__)
 
+try:
+    import lxml.html as lxml_html
+    from lxml import etree
+except ImportError:
+    lxml_html = None
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+
+def _compile_any(patterns, ignore_case: bool = False):
+    """
+    Compile patterns into one alternation so that extraction takes a single scan
+    
+    RE2 is preferred when installed for linear-time matching; patterns it rejects
+    fall back to Python's re.
+    """
+    pattern = '|'.join(f'(?:{p})' for p in patterns)
+    if ignore_case:
+        pattern = '(?i)' + pattern
+    
+    if re2:
+        try:
+            return re2.compile(pattern)
+        except Exception:
+            logger.debug(f"RE2 cannot compile '{pattern}', falling back to re")
+    return re.compile(pattern)
+
+
+# ASCII control characters other than tab, newline and carriage return
+_CONTROL_CHARS = dict.fromkeys([*range(0x00, 0x09), 0x0b, 0x0c, *range(0x0e, 0x20), 0x7f])
+
+# HTML patterns, compiled once
+# Blocks clean_html removes: opening marker and closing pattern per kind
+_BLOCK_OPEN_PATTERNS = {'script': r'script', 'style': r'style', 'comment': r'!--'}
+_BLOCK_CLOSE_RES = {
+    'script': re.compile(r'</script>', re.IGNORECASE),
+    'style': re.compile(r'</style>', re.IGNORECASE),
+    'comment': re.compile(r'-->'),
+}
+# Whitespace runs other than a lone space, i.e. those that change when collapsed to ' '
+_WS_RE = re.compile(r'[^\S ]\s*| \s+')
+_TAG_RE = re.compile(r'<[^>]+>')
+_BLANK_LINES_RE = re.compile(r'\n\s*\n')
+# Only space/tab runs that change when collapsed; a lone space is left alone
+_SPACES_TABS_RE = re.compile(r'\t[ \t]*| [ \t]+')
+_LINE_INDENT_RE = re.compile(r'\n +')
+_LINK_RE = re.compile(r'<a[^>]*href=["\']([^"\']*)["\'][^>]*>(.*?)</a>', re.DOTALL | re.IGNORECASE)
+_IMG_RE = re.compile(r'<img([^>]*)>', re.IGNORECASE)
+_SRC_ATTR_RE = re.compile(r'src=["\']([^"\']*)["\']', re.IGNORECASE)
+_ALT_ATTR_RE = re.compile(r'alt=["\']([^"\']*)["\']', re.IGNORECASE)
+_TITLE_ATTR_RE = re.compile(r'title=["\']([^"\']*)["\']', re.IGNORECASE)
+_META_NAME_RE = re.compile(r'<meta[^>]*name=["\']([^"\']*)["\'][^>]*content=["\']([^"\']*)["\'][^>]*>', re.IGNORECASE)
+_META_PROP_RE = re.compile(r'<meta[^>]*property=["\']([^"\']*)["\'][^>]*content=["\']([^"\']*)["\'][^>]*>', re.IGNORECASE)
+_TITLE_RE = re.compile(r'<title[^>]*>(.*?)</title>', re.DOTALL | re.IGNORECASE)
+_HEADING_RE = re.compile(r'<(h[1-6])[^>]*id=["\']([^"\']*)["\'][^>]*>(.*?)</\1>', re.DOTALL | re.IGNORECASE)
+
+# Text patterns, compiled once
+_SPACES_RE = re.compile(r' {2,}')
+_SPECIAL_CHARS_RE = re.compile(r'[^\w\s\n.,!?;:()[\]{}"\'-]')
+_SPECIAL_CHARS_NO_NEWLINES_RE = re.compile(r'[^\w\s.,!?;:()[\]{}"\'-]')
+# ASCII characters each pattern removes, as str.translate deletion tables
+_SPECIAL_CHARS_TABLE = dict.fromkeys(c for c in range(128) if _SPECIAL_CHARS_RE.match(chr(c)))
+_SPECIAL_CHARS_NO_NEWLINES_TABLE = dict.fromkeys(
+    c for c in range(128) if _SPECIAL_CHARS_NO_NEWLINES_RE.match(chr(c))
+)
+# Multi-pattern extractors scan the text once with an alternation of their patterns
+_DATE_PATTERNS = (
+    r'\d{1,2}/\d{1,2}/\d{2,4}',  # MM/DD/YYYY or M/D/YY
+    r'\d{1,2}-\d{1,2}-\d{2,4}',  # MM-DD-YYYY
+    r'\d{4}-\d{1,2}-\d{1,2}',    # YYYY-MM-DD
+    r'\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{2,4}',  # DD Month YYYY
+    r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2},?\s+\d{2,4}'  # Month DD, YYYY
+)
+_DATES_RE = _compile_any(_DATE_PATTERNS, ignore_case=True)
+# An address is found by scanning from the start of each run of address characters
+# (or from the end of the previous match) only: retrying from every \b inside a long
+# run that has no valid address made the plain \b-anchored pattern quadratic
+_EMAIL_PATTERN = r'([A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b)'
+_EMAIL_RE = re.compile(r'(?<![A-Za-z0-9._%+-])(?:\b|[.%+-]+\b)' + _EMAIL_PATTERN)
+_EMAIL_AT_RE = re.compile(_EMAIL_PATTERN)
+_PHONE_PATTERNS = (
+    r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',  # 123-456-7890 or 123.456.7890
+    r'\b\(\d{3}\)\s*\d{3}[-.]?\d{4}\b',  # (123) 456-7890
+    r'\b\d{3}\s\d{3}\s\d{4}\b',  # 123 456 7890
+    r'\+\d{1,3}\s\d{3}\s\d{3}\s\d{4}\b'  # +1 123 456 7890
+)
+_PHONES_RE = _compile_any(_PHONE_PATTERNS)
+_URL_RE = re.compile(r'https?://(?:[-\w.])+(?:[:\d]+)?(?:/(?:[\w/_.])*(?:\?(?:[\w&=%.])*)?(?:#(?:[\w.])*)?)?')
+_NUM_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_CURRENCY_PATTERNS = (
+    r'\$\d+(?:,\d{3})*(?:\.\d{2})?',  # $1,234.56
+    r'\d+(?:,\d{3})*(?:\.\d{2})?\s*(?:USD|dollars?)',  # 1,234.56 USD
+    r'(?:USD|dollars?)\s*\d+(?:,\d{3})*(?:\.\d{2})?'  # USD 1,234.56
+)
+_CURRENCY_RE = _compile_any(_CURRENCY_PATTERNS, ignore_case=True)
+_EXCLAMATIONS_RE = re.compile(r'[!]{2,}')
+_QUESTIONS_RE = re.compile(r'[?]{2,}')
+_PERIODS_RE = re.compile(r'[.]{2,}')
+_BRACKETED_RE = re.compile(r'\[.*?\]')
+_PARENTHETICAL_RE = re.compile(r'\([^)]*\)')
+
+# Elements whose content is never page text
+_NON_TEXT_TAGS = frozenset({'script', 'style'})
+
+# Elements that start a new line when extracting text with preserve_structure
+_BLOCK_TAGS = frozenset({'p', 'div', 'br', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'})
+_BLOCK_MARK = '\ue000'
+_HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+
+
+@lru_cache(maxsize=8)
+def _parse_document(html_content: str):
+    """
+    Parse HTML into an lxml tree without script/style elements
+    
+    Memoized so that the extractors a crawler calls in turn on the same page share
+    one parse. The returned tree is shared: callers must not modify it.
+    
+    Args:
+        html_content: HTML document or fragment
+    
+    Returns:
+        Root element, or None if lxml is unavailable or cannot parse the content
+    """
+    if lxml_html is None or not html_content or not html_content.strip():
+        return None
+    
+    try:
+        tree = lxml_html.fromstring(html_content)
+    except (etree.ParserError, ValueError) as e:
+        logger.debug(f"lxml could not parse HTML, using regex extraction: {e}")
+        return None
+    
+    # No extractor reads script/style content
+    etree.strip_elements(tree, *_NON_TEXT_TAGS, with_tail=False)
+    return tree
+
+
+@lru_cache(maxsize=None)
+def _block_opener(kinds: tuple):
+    """Pattern finding the next opening marker of any of the given block kinds"""
+    # The shared '<' prefix is kept outside the alternation so the engine can scan for it
+    alternatives = '|'.join(f'(?P<{kind}>{_BLOCK_OPEN_PATTERNS[kind]})' for kind in kinds)
+    return re.compile(f'<(?:{alternatives})', re.IGNORECASE)
+
+
+def _strip_blocks(html_content: str, kinds: tuple) -> str:
+    """
+    Remove script/style element blocks and comments in one forward scan
+    
+    Each block runs from its opening marker (for elements, through the end of the
+    opening tag) to the first closing pattern after it. Searches resume where the
+    previous one stopped, so unclosed blocks cost one scan to the end of the document
+    instead of one per opening marker.
+    
+    Args:
+        html_content: HTML content
+        kinds: Block kinds to remove ('script', 'style', 'comment')
+    
+    Returns:
+        HTML content without the blocks
+    """
+    parts = []
+    pos = 0
+    while kinds:
+        start = _block_opener(kinds).search(html_content, pos)
+        if start is None:
+            break
+        
+        kind = start.lastgroup
+        body_start = start.end()
+        if kind != 'comment':
+            body_start = html_content.find('>', body_start) + 1
+        
+        end = _BLOCK_CLOSE_RES[kind].search(html_content, body_start) if body_start else None
+        if end is None:
+            # Blocks of this kind opening later cannot be closed either
+            kinds = tuple(k for k in kinds if k != kind)
+            continue
+        
+        parts.append(html_content[pos:start.start()])
+        pos = end.end()
+    
+    if not parts:
+        return html_content
+    
+    parts.append(html_content[pos:])
+    return ''.join(parts)
+
+
+def _fragment_text(fragment: str) -> str:
+    """Text of a small regex-matched HTML fragment (link, title or heading content)"""
+    return ' '.join(html.unescape(_TAG_RE.sub('', fragment)).split())
+
+
+def _element_text(element) -> str:
+    """Text content of an lxml element with whitespace runs collapsed"""
+    return ' '.join(element.text_content().split())
+
+
+def _document_text(tree, preserve_structure: bool) -> str:
+    """
+    Raw text of a parsed document
+    
+    Args:
+        tree: Root element from _parse_document
+        preserve_structure: Whether to mark block element boundaries with _BLOCK_MARK
+    
+    Returns:
+        Text content with whitespace as in the source
+    """
+    if preserve_structure:
+        # Mark a copy so that the cached tree stays untouched
+        tree = copy.deepcopy(tree)
+        for element in tree.iter(*_BLOCK_TAGS):
+            element.text = _BLOCK_MARK + (element.text or '')
+            if element.tag != 'br':
+                element.tail = _BLOCK_MARK + (element.tail or '')
+    
+    return tree.text_content()
+
+
+class _TextExtractor(HTMLParser):
+    """
+    Single-pass HTML text extractor used when lxml is not installed
+    
+    Skips script/style content and comments; entities are decoded by the parser.
+    """
+    
+    def __init__(self, preserve_structure: bool = False):
+        super().__init__(convert_charrefs=True)
+        self.preserve_structure = preserve_structure
+        self.skip_depth = 0
+        self.buf = []
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in _NON_TEXT_TAGS:
+            self.skip_depth += 1
+        elif self.preserve_structure and tag in _BLOCK_TAGS:
+            self.buf.append(_BLOCK_MARK)
+    
+    def handle_startendtag(self, tag, attrs):
+        if self.preserve_structure and tag in _BLOCK_TAGS:
+            self.buf.append(_BLOCK_MARK)
+    
+    def handle_endtag(self, tag):
+        if tag in _NON_TEXT_TAGS:
+            if self.skip_depth:
+                self.skip_depth -= 1
+        elif self.preserve_structure and tag in _BLOCK_TAGS:
+            self.buf.append(_BLOCK_MARK)
+    
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.buf.append(data)
+    
+    def text(self, html_content: str) -> str:
+        """
+        Feed a document and return its raw text
+        
+        Args:
+            html_content: HTML content
+        
+        Returns:
+            Text content with whitespace as in the source
+        """
+        self.feed(html_content)
+        self.close()
+        return ''.join(self.buf)
+
+
+def _normalize_text_whitespace(text: str) -> str:
+    """
+    Collapse blank-line runs, space/tab runs and line indentation in extracted text
+    
+    Each pass runs entirely inside the regex engine; an alternation with a Python
+    replacement callback benchmarked slower than these three C-level passes.
+    """
+    text = _BLANK_LINES_RE.sub('\n\n', text)  # Multiple line breaks to double line breaks
+    text = _SPACES_TABS_RE.sub(' ', text)  # Multiple spaces to single space
+    text = _LINE_INDENT_RE.sub('\n', text)  # Remove leading spaces after line breaks
+    return text.strip()
+
+
 class HTMLProcessor:
     """
     HTML processing utilities for web crawling
@@ -29,17 +319,12 @@ class HTMLProcessor:
         Returns:
             Cleaned HTML content
         """
-        if remove_scripts:
-            html_content = re.sub(r'<script[^>]*>.*?</script>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
-        
-        if remove_styles:
-            html_content = re.sub(r'<style[^>]*>.*?</style>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
-        
-        # Remove comments
-        html_content = re.sub(r'<!--.*?-->', '', html_content, flags=re.DOTALL)
+        # Remove scripts, styles and comments in a single scan
+        kinds = ('script',) * remove_scripts + ('style',) * remove_styles + ('comment',)
+        html_content = _strip_blocks(html_content, kinds)
         
         # Remove excessive whitespace
-        html_content = re.sub(r'\s+', ' ', html_content)
+        html_content = _WS_RE.sub(' ', html_content)
         
         return html_content.strip()
     
@@ -55,26 +340,18 @@ class HTMLProcessor:
         Returns:
             Clean text content
         """
-        # Clean HTML first
-        clean_html = HTMLProcessor.clean_html(html_content)
-        
-        if preserve_structure:
-            # Replace some tags with line breaks
-            clean_html = re.sub(r'</(p|div|br|h[1-6])>', '\n', clean_html, flags=re.IGNORECASE)
-            clean_html = re.sub(r'<(p|div|br|h[1-6])[^>]*>', '\n', clean_html, flags=re.IGNORECASE)
-        
-        # Remove all HTML tags
-        text = re.sub(r'<[^>]+>', '', clean_html)
-        
-        # Decode HTML entities
-        text = html.unescape(text)
+        tree = _parse_document(html_content)
+        if tree is not None:
+            text = _document_text(tree, preserve_structure)
+        else:
+            text = _TextExtractor(preserve_structure).text(html_content or '')
         
-        # Clean up whitespace
-        text = re.sub(r'\n\s*\n', '\n\n', text)  # Multiple line breaks to double line breaks
-        text = re.sub(r'[ \t]+', ' ', text)  # Multiple spaces to single space
-        text = re.sub(r'\n +', '\n', text)  # Remove leading spaces after line breaks
+        if not preserve_structure:
+            return ' '.join(text.split())
         
-        return text.strip()
+        # Collapse source whitespace first so that only block boundaries become line breaks
+        text = _WS_RE.sub(' ', text).replace(_BLOCK_MARK, '\n')
+        return _normalize_text_whitespace(text)
     
     @staticmethod
     def extract_links(html_content: str, base_url: str = None) -> List[Dict[str, str]]:
@@ -90,13 +367,26 @@ class HTMLProcessor:
         """
         links = []
         
+        tree = _parse_document(html_content)
+        if tree is not None:
+            for anchor in tree.iter('a'):
+                href = anchor.get('href')
+                text = _element_text(anchor)
+                if href is None or not text:
+                    continue
+                
+                url = urljoin(base_url, href) if base_url and href else href
+                if url:
+                    links.append({'url': url, 'text': text})
+            
+            return links
+        
         # Find all anchor tags
-        link_pattern = r'<a[^>]*href=["\']([^"\']*)["\'][^>]*>(.*?)</a>'
-        matches = re.findall(link_pattern, html_content, re.DOTALL | re.IGNORECASE)
+        matches = _LINK_RE.findall(html_content)
         
         for href, text in matches:
             # Clean the text
-            text = HTMLProcessor.extract_text_from_html(text)
+            text = _fragment_text(text)
             
             # Resolve relative URLs
             if base_url and href:
@@ -126,21 +416,35 @@ class HTMLProcessor:
         """
         images = []
         
+        tree = _parse_document(html_content)
+        if tree is not None:
+            for img in tree.iter('img'):
+                src = img.get('src')
+                if src is None:
+                    continue
+                
+                images.append({
+                    'src': urljoin(base_url, src) if base_url else src,
+                    'alt': img.get('alt', ''),
+                    'title': img.get('title', '')
+                })
+            
+            return images
+        
         # Find all img tags with their attributes
-        img_pattern = r'<img([^>]*)>'
-        matches = re.findall(img_pattern, html_content, re.IGNORECASE)
+        matches = _IMG_RE.findall(html_content)
         
         for img_attrs in matches:
             # Extract src attribute
-            src_match = re.search(r'src=["\']([^"\']*)["\']', img_attrs, re.IGNORECASE)
+            src_match = _SRC_ATTR_RE.search(img_attrs)
             if not src_match:
                 continue
             
             src = src_match.group(1)
             
             # Extract alt and title attributes
-            alt_match = re.search(r'alt=["\']([^"\']*)["\']', img_attrs, re.IGNORECASE)
-            title_match = re.search(r'title=["\']([^"\']*)["\']', img_attrs, re.IGNORECASE)
+            alt_match = _ALT_ATTR_RE.search(img_attrs)
+            title_match = _TITLE_ATTR_RE.search(img_attrs)
             
             alt = alt_match.group(1) if alt_match else ""
             title = title_match.group(1) if title_match else ""
@@ -172,16 +476,27 @@ class HTMLProcessor:
         """
         meta_tags = {}
         
+        tree = _parse_document(html_content)
+        if tree is not None:
+            metas = [meta for meta in tree.iter('meta') if meta.get('content') is not None]
+            
+            # Property meta tags (Open Graph, etc.) take precedence over name meta tags
+            for attribute in ('name', 'property'):
+                for meta in metas:
+                    key = meta.get(attribute)
+                    if key is not None:
+                        meta_tags[key.lower()] = meta.get('content')
+            
+            return meta_tags
+        
         # Find all meta tags
-        meta_pattern = r'<meta[^>]*name=["\']([^"\']*)["\'][^>]*content=["\']([^"\']*)["\'][^>]*>'
-        matches = re.findall(meta_pattern, html_content, re.IGNORECASE)
+        matches = _META_NAME_RE.findall(html_content)
         
         for name, content in matches:
             meta_tags[name.lower()] = content
         
         # Also extract property meta tags (Open Graph, etc.)
-        property_pattern = r'<meta[^>]*property=["\']([^"\']*)["\'][^>]*content=["\']([^"\']*)["\'][^>]*>'
-        property_matches = re.findall(property_pattern, html_content, re.IGNORECASE)
+        property_matches = _META_PROP_RE.findall(html_content)
         
         for prop, content in property_matches:
             meta_tags[prop.lower()] = content
@@ -199,11 +514,15 @@ class HTMLProcessor:
         Returns:
             Page title or None
         """
-        title_pattern = r'<title[^>]*>(.*?)</title>'
-        match = re.search(title_pattern, html_content, re.DOTALL | re.IGNORECASE)
+        tree = _parse_document(html_content)
+        if tree is not None:
+            title = next(tree.iter('title'), None)
+            return (_element_text(title) or None) if title is not None else None
+        
+        match = _TITLE_RE.search(html_content)
         
         if match:
-            title = HTMLProcessor.extract_text_from_html(match.group(1))
+            title = _fragment_text(match.group(1))
             return title.strip() if title else None
         
         return None
@@ -221,13 +540,26 @@ class HTMLProcessor:
         """
         headings = []
         
+        tree = _parse_document(html_content)
+        if tree is not None:
+            for heading in tree.iter(*_HEADING_TAGS):
+                heading_id = heading.get('id')
+                text = _element_text(heading)
+                if heading_id is not None and text:
+                    headings.append({
+                        'level': int(heading.tag[1]),
+                        'text': text,
+                        'id': heading_id
+                    })
+            
+            return headings
+        
         # Find all heading tags (h1-h6)
-        heading_pattern = r'<(h[1-6])[^>]*id=["\']([^"\']*)["\'][^>]*>(.*?)</\1>'
-        matches = re.findall(heading_pattern, html_content, re.DOTALL | re.IGNORECASE)
+        matches = _HEADING_RE.findall(html_content)
         
         for tag, heading_id, text in matches:
             level = int(tag[1])  # Extract number from h1, h2, etc.
-            clean_text = HTMLProcessor.extract_text_from_html(text)
+            clean_text = _fragment_text(text)
             
             if clean_text.strip():
                 headings.append({
@@ -258,16 +590,50 @@ class TextCleaner:
             return ""
         
         # Replace multiple spaces with single space
-        text = re.sub(r' +', ' ', text)
+        text = _SPACES_RE.sub(' ', text)
         
         # Replace multiple newlines with double newline
-        text = re.sub(r'\n\s*\n', '\n\n', text)
+        text = _BLANK_LINES_RE.sub('\n\n', text)
         
         # Remove leading/trailing whitespace
         text = text.strip()
         
         return text
     
+    @staticmethod
+    def clean(text: str) -> str:
+        """
+        Normalize an extracted value in one pass: decode HTML entities,
+        drop control characters and collapse whitespace runs to a single space
+        
+        Args:
+            text: Input text
+            
+        Returns:
+            Cleaned single-line text
+        """
+        if not text:
+            return ""
+        
+        if '&' in text:
+            text = html.unescape(text)
+        
+        # str.translate and str.split both run in C, one pass each over the buffer
+        return ' '.join(text.translate(_CONTROL_CHARS).split())
+    
+    @staticmethod
+    def clean_many(texts: List[str]) -> List[str]:
+        """
+        Clean a batch of extracted values
+        
+        Args:
+            texts: Input texts
+            
+        Returns:
+            Cleaned texts, in the same order
+        """
+        return list(map(TextCleaner.clean, texts))
+    
     @staticmethod
     def remove_special_characters(text: str, keep_newlines: bool = True) -> str:
         """
@@ -283,12 +649,17 @@ class TextCleaner:
         if not text:
             return ""
         
+        # ASCII text needs no Unicode \w/\s classification, so a table lookup per
+        # character replaces the regex engine
+        if text.isascii():
+            return text.translate(_SPECIAL_CHARS_TABLE if keep_newlines else _SPECIAL_CHARS_NO_NEWLINES_TABLE)
+        
         if keep_newlines:
             # Keep alphanumeric, spaces, newlines, and common punctuation
-            text = re.sub(r'[^\w\s\n.,!?;:()[\]{}"\'-]', '', text)
+            text = _SPECIAL_CHARS_RE.sub('', text)
         else:
             # Keep alphanumeric, spaces, and common punctuation
-            text = re.sub(r'[^\w\s.,!?;:()[\]{}"\'-]', '', text)
+            text = _SPECIAL_CHARS_NO_NEWLINES_RE.sub('', text)
         
         return text
     
@@ -303,22 +674,7 @@ class TextCleaner:
         Returns:
             List of found date strings
         """
-        dates = []
-        
-        # Common date patterns
-        patterns = [
-            r'\d{1,2}/\d{1,2}/\d{2,4}',  # MM/DD/YYYY or M/D/YY
-            r'\d{1,2}-\d{1,2}-\d{2,4}',  # MM-DD-YYYY
-            r'\d{4}-\d{1,2}-\d{1,2}',    # YYYY-MM-DD
-            r'\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{2,4}',  # DD Month YYYY
-            r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2},?\s+\d{2,4}'  # Month DD, YYYY
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            dates.extend(matches)
-        
-        return list(set(dates))  # Remove duplicates
+        return list(dict.fromkeys(_DATES_RE.findall(text)))  # Remove duplicates, keeping first-seen order
     
     @staticmethod
     def extract_emails(text: str) -> List[str]:
@@ -331,9 +687,22 @@ class TextCleaner:
         Returns:
             List of email addresses
         """
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, text)
-        return list(set(emails))  # Remove duplicates
+        if '@' not in text:
+            return []
+        
+        emails = []
+        pos = 0
+        after_match = False
+        while True:
+            # An address may directly follow the previous one; otherwise search for the next run
+            match = (after_match and _EMAIL_AT_RE.match(text, pos)) or _EMAIL_RE.search(text, pos)
+            if match is None:
+                break
+            emails.append(match.group(1))
+            pos = match.end()
+            after_match = True
+        
+        return list(dict.fromkeys(emails))  # Remove duplicates, keeping first-seen order
     
     @staticmethod
     def extract_phone_numbers(text: str) -> List[str]:
@@ -346,19 +715,7 @@ class TextCleaner:
         Returns:
             List of phone numbers
         """
-        phone_patterns = [
-            r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',  # 123-456-7890 or 123.456.7890
-            r'\b\(\d{3}\)\s*\d{3}[-.]?\d{4}\b',  # (123) 456-7890
-            r'\b\d{3}\s\d{3}\s\d{4}\b',  # 123 456 7890
-            r'\+\d{1,3}\s\d{3}\s\d{3}\s\d{4}\b'  # +1 123 456 7890
-        ]
-        
-        phones = []
-        for pattern in phone_patterns:
-            matches = re.findall(pattern, text)
-            phones.extend(matches)
-        
-        return list(set(phones))  # Remove duplicates
+        return list(dict.fromkeys(_PHONES_RE.findall(text)))  # Remove duplicates, keeping first-seen order
     
     @staticmethod
     def extract_urls(text: str) -> List[str]:
@@ -371,9 +728,7 @@ class TextCleaner:
         Returns:
             List of URLs
         """
-        url_pattern = r'https?://(?:[-\w.])+(?:[:\d]+)?(?:/(?:[\w/_.])*(?:\?(?:[\w&=%.])*)?(?:#(?:[\w.])*)?)?'
-        urls = re.findall(url_pattern, text)
-        return list(set(urls))  # Remove duplicates
+        return list(dict.fromkeys(_URL_RE.findall(text)))  # Remove duplicates, keeping first-seen order
     
     @staticmethod
     def extract_numbers(text: str) -> List[str]:
@@ -387,8 +742,7 @@ class TextCleaner:
             List of number strings
         """
         # Find integers and decimals
-        number_pattern = r'\b\d+(?:\.\d+)?\b'
-        numbers = re.findall(number_pattern, text)
+        numbers = _NUM_RE.findall(text)
         return numbers
     
     @staticmethod
@@ -402,18 +756,7 @@ class TextCleaner:
         Returns:
             List of currency amount strings
         """
-        currency_patterns = [
-            r'\$\d+(?:,\d{3})*(?:\.\d{2})?',  # $1,234.56
-            r'\d+(?:,\d{3})*(?:\.\d{2})?\s*(?:USD|dollars?)',  # 1,234.56 USD
-            r'(?:USD|dollars?)\s*\d+(?:,\d{3})*(?:\.\d{2})?'  # USD 1,234.56
-        ]
-        
-        amounts = []
-        for pattern in currency_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            amounts.extend(matches)
-        
-        return list(set(amounts))  # Remove duplicates
+        return list(dict.fromkeys(_CURRENCY_RE.findall(text)))  # Remove duplicates, keeping first-seen order
     
     @staticmethod
     def clean_text_for_analysis(text: str) -> str:
@@ -433,17 +776,16 @@ class TextCleaner:
         text = TextCleaner.normalize_whitespace(text)
         
         # Remove excessive punctuation
-        text = re.sub(r'[!]{2,}', '!', text)
-        text = re.sub(r'[?]{2,}', '?', text)
-        text = re.sub(r'[.]{2,}', '.', text)
+        text = _EXCLAMATIONS_RE.sub('!', text)
+        text = _QUESTIONS_RE.sub('?', text)
+        text = _PERIODS_RE.sub('.', text)
         
         # Remove common noise patterns
-        text = re.sub(r'\[.*?\]', '', text)  # Remove bracketed content
-        text = re.sub(r'\([^)]*\)', '', text)  # Remove parenthetical content
+        text = _BRACKETED_RE.sub('', text)  # Remove bracketed content
+        text = _PARENTHETICAL_RE.sub('', text)  # Remove parenthetical content
         
         # Normalize quotes
-        text = re.sub(r'["""]', '"', text)
-        text = re.sub(r'[''']', "'", text)
+        text = text.replace('“', '"').replace('”', '"').replace('‘', "'").replace('’', "'")
         
         return text.strip()
     
@@ -463,14 +805,69 @@ class TextCleaner:
         if not text or len(text) <= max_length:
             return text
         
-        truncated = text[:max_length]
-        
-        # Try to break at word boundary
-        last_space = truncated.rfind(' ')
-        if last_space > max_length * 0.8:  # If we have a reasonable word break
-            truncated = truncated[:last_space]
+        # Try to break at a word boundary in the last 20%, searching the original text
+        # so that only the final slice is copied
+        last_space = text.rfind(' ', int(max_length * 0.8) + 1, max_length)
+        truncated = text[:last_space] if last_space != -1 else text[:max_length]
         
         if add_ellipsis:
             truncated += "..."
         
-        return truncated 
\ No newline at end of file
+        return truncated
+
+class URLNormalizer:
+    """
+    URL canonicalization so trivially different links to the same page are crawled once
+    """
+    
+    # Query parameters that only carry tracking/attribution data
+    TRACKING_PARAMS = frozenset({
+        'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid',
+        '_ga', '_gl', 'igshid', 'ref_src', 'spm'
+    })
+    TRACKING_PREFIXES = ('utm_',)
+    
+    @staticmethod
+    def normalize(url: str) -> str:
+        """
+        Normalize a URL: lowercase scheme/host, drop default ports, fragments and tracking parameters
+        
+        Args:
+            url: Input URL
+            
+        Returns:
+            Canonical URL
+        """
+        parsed = urlparse(url.strip())
+        if not parsed.scheme or not parsed.netloc:
+            return url
+        
+        scheme = parsed.scheme.lower()
+        netloc = parsed.netloc.lower()
+        if (scheme == 'http' and netloc.endswith(':80')) or (scheme == 'https' and netloc.endswith(':443')):
+            netloc = netloc.rsplit(':', 1)[0]
+        
+        query = parsed.query
+        if query:
+            params = [
+                (key, value) for key, value in parse_qsl(query, keep_blank_values=True)
+                if key.lower() not in URLNormalizer.TRACKING_PARAMS
+                and not key.lower().startswith(URLNormalizer.TRACKING_PREFIXES)
+            ]
+            # Sort by key only; the stable sort keeps repeated keys in their original order
+            query = urlencode(sorted(params, key=lambda param: param[0]))
+        
+        return urlunparse((scheme, netloc, parsed.path or '/', parsed.params, query, ''))
+    
+    @staticmethod
+    def deduplicate(urls: List[str]) -> List[str]:
+        """
+        Normalize URLs and drop duplicates, keeping first-seen order
+        
+        Args:
+            urls: Input URLs
+            
+        Returns:
+            Unique canonical URLs
+        """
+        return list(dict.fromkeys(URLNormalizer.normalize(url) for url in urls))
@@ -4,7 +4,6 @@ Proxy Manager for FPDS.gov Crawler
 Handles proxy rotation, rate limiting, and anti-detection
 """
 
-import requests
 import time
 import random
 import logging
@@ -14,6 +13,11 @@ import json
 from datetime import datetime, timedelta
 from collections import deque
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 class ProxyManager:
@@ -24,18 +28,20 @@ class ProxyManager:
         self.max_requests_per_proxy = max_requests_per_proxy
         self.proxy_stats = {}  # Track usage per proxy
         self.lock = Lock()
-        self.current_proxy_index = 0
+        # Rotation order; blocked or exhausted proxies are dropped lazily when reached
+        self._eligible = deque(self.proxies)
         
         # Rate limiting settings
         self.min_delay = 0.5  # Minimum seconds between requests (much faster!)
         self.max_delay = 5  # Maximum seconds between requests
-        self.last_request_time = 0
+        self.last_request_time = 0  # time.monotonic() of the last request
         
         # Smart rate limiting
         self.adaptive_mode = True
-        self.success_count = 0
-        self.error_count = 0
         self.recent_requests = deque(maxlen=50)  # Track last 50 requests
+        self._window_successes = 0  # Successes currently in recent_requests
+        # (proxy, success, timestamp_ns) outcomes not yet folded into the stats
+        self._pending_outcomes = deque()
         
         # Anti-detection settings
         self.user_agents = [
@@ -51,7 +57,7 @@ class ProxyManager:
             self.proxy_stats[proxy] = {
                 'requests': 0,
                 'errors': 0,
-                'last_used': None,
+                'last_used_ns': None,  # time.monotonic_ns() of the last use
                 'blocked': False
             }
     
@@ -60,10 +66,11 @@ class ProxyManager:
         with self.lock:
             if proxy not in self.proxies:
                 self.proxies.append(proxy)
+                self._eligible.append(proxy)
                 self.proxy_stats[proxy] = {
                     'requests': 0,
                     'errors': 0,
-                    'last_used': None,
+                    'last_used_ns': None,
                     'blocked': False
                 }
                 logger.info(f"Added proxy: {proxy}")
@@ -74,22 +81,28 @@ class ProxyManager:
             return None
         
         with self.lock:
-            attempts = 0
-            while attempts < len(self.proxies):
-                proxy = self.proxies[self.current_proxy_index]
-                self.current_proxy_index = (self.current_proxy_index + 1) % len(self.proxies)
-                
-                # Check if proxy is available
-                if not self.proxy_stats[proxy]['blocked'] and \
-                   self.proxy_stats[proxy]['requests'] < self.max_requests_per_proxy:
-                    return proxy
-                
-                attempts += 1
+            self._apply_pending_outcomes()
+            proxy = self._pop_eligible()
+            if proxy is not None:
+                return proxy
             
             # If all proxies are blocked or at limit, reset stats
             logger.warning("All proxies blocked or at limit, resetting stats")
             self._reset_proxy_stats()
-            return self.proxies[0] if self.proxies else None
+            return self._pop_eligible()
+    
+    def _pop_eligible(self) -> Optional[str]:
+        """Rotate to the next available proxy, discarding unavailable ones (caller holds the lock)"""
+        while self._eligible:
+            proxy = self._eligible.popleft()
+            stats = self.proxy_stats.get(proxy)
+            
+            # Check if proxy is available
+            if stats and not stats['blocked'] and stats['requests'] < self.max_requests_per_proxy:
+                self._eligible.append(proxy)
+                return proxy
+        
+        return None
     
     def _reset_proxy_stats(self):
         """Reset proxy statistics"""
@@ -97,33 +110,46 @@ class ProxyManager:
             self.proxy_stats[proxy]['requests'] = 0
             self.proxy_stats[proxy]['errors'] = 0
             self.proxy_stats[proxy]['blocked'] = False
+        self._eligible = deque(self.proxies)
     
     def mark_proxy_success(self, proxy: str):
         """Mark proxy as successfully used"""
-        with self.lock:
-            if proxy in self.proxy_stats:
-                self.proxy_stats[proxy]['requests'] += 1
-                self.proxy_stats[proxy]['last_used'] = datetime.now()
-            
-            # Update adaptive rate limiting stats
-            self.success_count += 1
-            self.recent_requests.append({'success': True, 'timestamp': datetime.now()})
+        # deque.append is atomic, so workers record outcomes without taking the lock;
+        # the next reader of the stats folds them in
+        self._pending_outcomes.append((proxy, True, time.monotonic_ns()))
     
     def mark_proxy_error(self, proxy: str, error_type: str = "general"):
         """Mark proxy as having an error"""
-        with self.lock:
-            if proxy in self.proxy_stats:
-                self.proxy_stats[proxy]['errors'] += 1
-                self.proxy_stats[proxy]['last_used'] = datetime.now()
-                
-                # Block proxy if too many errors
-                if self.proxy_stats[proxy]['errors'] >= 5:
-                    self.proxy_stats[proxy]['blocked'] = True
-                    logger.warning(f"Blocked proxy {proxy} due to {self.proxy_stats[proxy]['errors']} errors")
+        self._pending_outcomes.append((proxy, False, time.monotonic_ns()))
+    
+    def _apply_pending_outcomes(self):
+        """Fold recorded outcomes into proxy stats and the request window (caller holds the lock)"""
+        pending = self._pending_outcomes
+        while pending:
+            proxy, success, now = pending.popleft()
+            stats = self.proxy_stats.get(proxy)
+            if stats is not None:
+                stats['last_used_ns'] = now
+                if success:
+                    stats['requests'] += 1
+                else:
+                    stats['errors'] += 1
+                    
+                    # Block proxy if too many errors
+                    if stats['errors'] >= 5:
+                        stats['blocked'] = True
+                        logger.warning(f"Blocked proxy {proxy} due to {stats['errors']} errors")
             
             # Update adaptive rate limiting stats
-            self.error_count += 1
-            self.recent_requests.append({'success': False, 'timestamp': datetime.now()})
+            self._record_outcome(success, now)
+    
+    def _record_outcome(self, success: bool, timestamp_ns: int):
+        """Append to the rolling request window, keeping its success count in step (caller holds the lock)"""
+        if len(self.recent_requests) == self.recent_requests.maxlen and self.recent_requests[0][0]:
+            self._window_successes -= 1
+        self.recent_requests.append((success, timestamp_ns))
+        if success:
+            self._window_successes += 1
     
     def mark_proxy_blocked(self, proxy: str):
         """Mark proxy as blocked by target site"""
@@ -134,16 +160,22 @@ class ProxyManager:
     
     def get_random_user_agent(self) -> str:
         """Get a random user agent"""
-        return random.choice(self.user_agents)
+        # Scaling random() skips random.choice's Python-level _randbelow rejection loop
+        return self.user_agents[int(random.random() * len(self.user_agents))]
     
     def enforce_rate_limit(self):
         """Smart rate limiting that adapts based on success rates"""
-        current_time = time.time()
+        current_time = time.monotonic()
         time_since_last = current_time - self.last_request_time
         
+        with self.lock:
+            self._apply_pending_outcomes()
+            window_size = len(self.recent_requests)
+            window_successes = self._window_successes
+        
         # Calculate adaptive delay based on recent performance
-        if self.adaptive_mode and len(self.recent_requests) >= 10:
-            success_rate = self.success_count / max(1, self.success_count + self.error_count)
+        if self.adaptive_mode and window_size >= 10:
+            success_rate = window_successes / window_size
             
             if success_rate >= 0.95:  # 95%+ success rate
                 # Can be more aggressive
@@ -161,38 +193,69 @@ class ProxyManager:
             # Default delay for initial requests
             adaptive_delay = self.min_delay
         
-        # Ensure minimum delay
-        if time_since_last < adaptive_delay:
-            sleep_time = adaptive_delay - time_since_last
+        # Ensure minimum delay, plus small randomness to avoid patterns; time already
+        # spent since the last request counts towards both
+        jitter = random.uniform(0, adaptive_delay * 0.2)
+        sleep_time = adaptive_delay + jitter - time_since_last
+        if sleep_time > 0:
             time.sleep(sleep_time)
         
-        # Add small randomness to avoid patterns
-        random_delay = random.uniform(0, adaptive_delay * 0.2)
-        time.sleep(random_delay)
-        
-        self.last_request_time = time.time()
+        self.last_request_time = time.monotonic()
+    
+    def _stats_snapshot(self) -> Dict:
+        """Copy of proxy_stats with monotonic timestamps converted to datetimes (caller holds the lock)"""
+        now_ns = time.monotonic_ns()
+        now = datetime.now()
+        snapshot = {}
+        for proxy, stats in self.proxy_stats.items():
+            entry = dict(stats)
+            last_used_ns = entry.pop('last_used_ns', None)
+            if last_used_ns is not None:
+                entry['last_used'] = now - timedelta(microseconds=(now_ns - last_used_ns) // 1000)
+            else:
+                entry.setdefault('last_used', None)
+            snapshot[proxy] = entry
+        return snapshot
     
     def get_proxy_stats(self) -> Dict:
         """Get current proxy statistics"""
         with self.lock:
-            return self.proxy_stats.copy()
+            self._apply_pending_outcomes()
+            return self._stats_snapshot()
     
     def save_proxy_list(self, filename: str):
         """Save proxy list to file"""
+        with self.lock:
+            self._apply_pending_outcomes()
+            stats = self._stats_snapshot()
+        
+        data = {
+            'proxies': self.proxies,
+            'stats': stats
+        }
+        if orjson:
+            # Serializes the datetimes natively (ISO 8601)
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+            return
+        
         with open(filename, 'w') as f:
-            json.dump({
-                'proxies': self.proxies,
-                'stats': self.proxy_stats
-            }, f, indent=2, default=str)
+            json.dump(data, f, indent=2, default=str)
     
     def load_proxy_list(self, filename: str):
         """Load proxy list from file"""
         try:
-            with open(filename, 'r') as f:
-                data = json.load(f)
-                self.proxies = data.get('proxies', [])
-                self.proxy_stats = data.get('stats', {})
-                logger.info(f"Loaded {len(self.proxies)} proxies from {filename}")
+            if orjson:
+                with open(filename, 'rb') as f:
+                    data = orjson.loads(f.read())
+            else:
+                with open(filename, 'r') as f:
+                    data = json.load(f)
+            
+            self.proxies = data.get('proxies', [])
+            self.proxy_stats = data.get('stats', {})
+            self._eligible = deque(self.proxies)
+            logger.info(f"Loaded {len(self.proxies)} proxies from {filename}")
         except FileNotFoundError:
             logger.warning(f"Proxy file {filename} not found")
 
@@ -200,6 +263,9 @@ class ProxyManager:
 # Example proxy sources
 def get_free_proxies() -> List[str]:
     """Get list of free proxies (use with caution)"""
+    # Only needed here; keeps requests' import cost off ProxyManager users
+    import requests
+    
     proxies = []
     
     try:
@@ -4,21 +4,41 @@ Smart Rate Limiter for Large-Scale FPDS Crawling
 Adaptive rate limiting that balances speed with avoiding detection
 """
 
+import asyncio
 import time
 import random
 import logging
-from typing import Dict, List, Optional
-from threading import Lock
-from datetime import datetime, timedelta
+from itertools import cycle
 from collections import deque
+from typing import Dict, List, Optional
+from threading import Condition, Lock, local
+from datetime import timedelta
 
 logger = logging.getLogger(__name__)
 
+_JITTER_TABLE_SIZE = 1024
+
+def format_duration(seconds: float) -> str:
+    """Format a duration in seconds as H:MM:SS.ffffff for display"""
+    return str(timedelta(seconds=seconds))
+
 class SmartRateLimiter:
     """
     Adaptive rate limiter that adjusts based on success rates and blocking detection
     """
     
+    # One limiter per proxy can mean hundreds of instances, and every request reads these
+    __slots__ = (
+        'initial_delay', 'max_delay', 'min_delay', 'current_delay',
+        'success_threshold', 'failure_threshold', 'window_size',
+        'recent_window', 'recent_mask', 'recent_success', 'recent_blocked', 'recent_count',
+        '_pending_outcomes', 'lock',
+        'speed_factor', 'min_speed_factor', 'max_speed_factor', 'last_adjustment', 'adjustment_cooldown',
+        'oscillation_window', 'max_direction_flips', 'direction_flips', 'last_direction', 'locked_until',
+        'total_requests', 'successful_requests', 'blocked_requests', 'start_time', '_stats_cache',
+        '_jitter', '_pacing'
+    )
+    
     def __init__(self, 
                  initial_delay: float = 1.0,
                  max_delay: float = 10.0,
@@ -37,140 +57,219 @@ class SmartRateLimiter:
         self.failure_threshold = failure_threshold  # 80% failure rate triggers slowdown
         self.window_size = window_size
         
-        # Request history (last N requests)
-        self.request_history = deque(maxlen=window_size)
+        # Outcomes of the most recent requests (at most 50) packed as bitmasks,
+        # newest request in the lowest bit
+        self.recent_window = min(window_size, 50)
+        self.recent_mask = (1 << self.recent_window) - 1
+        self.recent_success = 0
+        self.recent_blocked = 0
+        self.recent_count = 0
+        self._pending_outcomes = deque()
         self.lock = Lock()
         
-        # Adaptive settings
-        self.aggressive_mode = False
-        self.conservative_mode = False
-        self.last_adjustment = datetime.now()
+        # Adaptive settings: delay = initial_delay / speed_factor, with the factor
+        # bounded so the delay stays within [min_delay, max_delay]
+        self.speed_factor = 1.0
+        self.min_speed_factor = max(0.25, initial_delay / max_delay) if max_delay > 0 else 0.25
+        self.max_speed_factor = min(4.0, initial_delay / min_delay) if min_delay > 0 else 4.0
+        self.last_adjustment = time.monotonic()
         self.adjustment_cooldown = 30  # seconds between adjustments
         
+        # Oscillation lock: too many direction changes within the window freeze speed-ups
+        self.oscillation_window = 300  # seconds
+        self.max_direction_flips = 3
+        self.direction_flips = deque()
+        self.last_direction = 0
+        self.locked_until = 0.0
+        
         # Statistics
         self.total_requests = 0
         self.successful_requests = 0
         self.blocked_requests = 0
-        self.start_time = datetime.now()
+        self.start_time = time.monotonic()
+        self._stats_cache = None  # (total_requests, stats)
+        
+        # Pre-drawn jitter factors, cycled per wait; next() on a cycle is atomic under the GIL
+        self._jitter = cycle([random.uniform(0.8, 1.2) for _ in range(_JITTER_TABLE_SIZE)])
+        
+        # Per-thread time of the last wait release
+        self._pacing = local()
     
     def wait(self, request_type: str = "general"):
         """Smart wait with adaptive timing"""
         
-        with self.lock:
-            # Calculate base delay
-            base_delay = self.current_delay
-            
-            # Add randomness to avoid patterns
-            random_factor = random.uniform(0.8, 1.2)
-            actual_delay = base_delay * random_factor
-            
-            # Apply mode-specific adjustments
-            if self.aggressive_mode:
-                actual_delay *= 0.5  # 50% faster in aggressive mode
-            elif self.conservative_mode:
-                actual_delay *= 2.0  # 2x slower in conservative mode
-            
-            # Ensure minimum delay
-            actual_delay = max(actual_delay, self.min_delay)
-            
-            logger.debug(f"Rate limiter: waiting {actual_delay:.2f}s (base: {base_delay:.2f}s, mode: {'aggressive' if self.aggressive_mode else 'conservative' if self.conservative_mode else 'normal'})")
-            
-            time.sleep(actual_delay)
+        actual_delay = self._compute_delay()
+        
+        # Time this thread already spent since its previous wait (e.g. on the request
+        # itself) counts toward the delay; only the first wait sleeps in full
+        now = time.monotonic()
+        last_release = getattr(self._pacing, 'last_release', None)
+        remaining = actual_delay if last_release is None else actual_delay - (now - last_release)
+        
+        if remaining > 0:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Rate limiter: waiting {remaining:.2f}s (delay: {actual_delay:.2f}s)")
+            time.sleep(remaining)
+            now += remaining
+        
+        self._pacing.last_release = now
+    
+    async def wait_async(self, request_type: str = "general"):
+        """Smart wait for asyncio crawlers; sleeps without blocking the event loop
+        
+        Coroutines share a thread, so no per-thread credit applies: every call
+        waits the full jittered delay.
+        """
+        actual_delay = self._compute_delay()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Rate limiter: waiting {actual_delay:.2f}s (async)")
+        await asyncio.sleep(actual_delay)
+    
+    def _compute_delay(self) -> float:
+        """Jittered delay for the next request"""
+        # A single attribute read needs no lock
+        base_delay = self.current_delay
+        
+        # Add randomness to avoid patterns, but never go below the minimum delay
+        return max(base_delay * next(self._jitter), self.min_delay)
     
     def record_request(self, success: bool, blocked: bool = False):
-        """Record request result and adjust rate limiting"""
+        """Record request result and adjust rate limiting
         
-        with self.lock:
+        The outcome is queued without locking (deque.append is atomic) and folded
+        in by whichever thread holds the lock next, so workers never block here.
+        """
+        self._pending_outcomes.append((success, blocked))
+        
+        if self.lock.acquire(blocking=False):
+            try:
+                self._apply_pending_outcomes()
+            finally:
+                self.lock.release()
+    
+    def _apply_pending_outcomes(self):
+        """Fold queued outcomes into the counters and adjust (caller holds the lock)"""
+        pending = self._pending_outcomes
+        if not pending:
+            return
+        
+        while pending:
+            success, blocked = pending.popleft()
             self.total_requests += 1
             if success:
                 self.successful_requests += 1
             if blocked:
                 self.blocked_requests += 1
             
-            # Add to history
-            self.request_history.append({
-                'success': success,
-                'blocked': blocked,
-                'timestamp': datetime.now()
-            })
-            
-            # Adjust rate limiting based on recent performance
-            self._adjust_rate_limiting()
+            # Add to history; the mask drops the oldest outcome
+            self.recent_success = ((self.recent_success << 1) | bool(success)) & self.recent_mask
+            self.recent_blocked = ((self.recent_blocked << 1) | bool(blocked)) & self.recent_mask
+            if self.recent_count < self.recent_window:
+                self.recent_count += 1
+        
+        # Adjust rate limiting based on recent performance, at most once per cooldown
+        now = time.monotonic()
+        if now - self.last_adjustment >= self.adjustment_cooldown:
+            self._adjust_rate_limiting(now)
     
-    def _adjust_rate_limiting(self):
-        """Adjust rate limiting based on recent success rates"""
+    def _adjust_rate_limiting(self, now: float):
+        """Adjust rate limiting based on recent success rates (cooldown already checked)"""
         
-        if len(self.request_history) < 10:  # Need minimum data
+        recent_count = self.recent_count
+        if recent_count < 10:  # Need minimum data
             return
+        self.last_adjustment = now
         
-        # Check if enough time has passed since last adjustment
-        if (datetime.now() - self.last_adjustment).total_seconds() < self.adjustment_cooldown:
-            return
+        # Calculate recent success and blocking rates
+        success_rate = bin(self.recent_success).count('1') / recent_count
+        blocked_rate = bin(self.recent_blocked).count('1') / recent_count
         
-        # Calculate recent success rate
-        recent_requests = list(self.request_history)[-50:]  # Last 50 requests
-        success_count = sum(1 for req in recent_requests if req['success'])
-        success_rate = success_count / len(recent_requests)
+        logger.info(f"Recent performance: {success_rate:.1%} success, {blocked_rate:.1%} blocked, current delay: {self.current_delay:.2f}s")
         
-        # Calculate recent blocking rate
-        blocked_count = sum(1 for req in recent_requests if req['blocked'])
-        blocked_rate = blocked_count / len(recent_requests)
+        # Graduated score in [-1, 1]: +1 at the success threshold, -1 at the failure
+        # threshold or at 10% blocked
+        spread = (self.success_threshold - self.failure_threshold) / 2 or 1.0
+        midpoint = self.failure_threshold + spread
+        score = (success_rate - midpoint) / spread - blocked_rate / 0.1
+        score = max(-1.0, min(score, 1.0))
         
-        logger.info(f"Recent performance: {success_rate:.1%} success, {blocked_rate:.1%} blocked, current delay: {self.current_delay:.2f}s")
+        # Dead band around the target keeps the current speed
+        if abs(score) < 0.2:
+            return
         
-        # Adjust based on performance
-        if success_rate >= self.success_threshold and blocked_rate < 0.05:
-            # High success, low blocking - can be more aggressive
-            if not self.aggressive_mode:
-                self.aggressive_mode = True
-                self.conservative_mode = False
-                self.current_delay = max(self.current_delay * 0.8, self.min_delay)
-                logger.info(f"Switching to aggressive mode, delay: {self.current_delay:.2f}s")
-        
-        elif success_rate < self.failure_threshold or blocked_rate > 0.1:
-            # Low success or high blocking - be more conservative
-            if not self.conservative_mode:
-                self.conservative_mode = True
-                self.aggressive_mode = False
-                self.current_delay = min(self.current_delay * 1.5, self.max_delay)
-                logger.info(f"Switching to conservative mode, delay: {self.current_delay:.2f}s")
-        
-        else:
-            # Normal performance - gradual adjustment
-            if self.aggressive_mode and success_rate < self.success_threshold:
-                self.aggressive_mode = False
-                self.current_delay = min(self.current_delay * 1.2, self.max_delay)
-                logger.info(f"Exiting aggressive mode, delay: {self.current_delay:.2f}s")
-            elif self.conservative_mode and success_rate > self.success_threshold:
-                self.conservative_mode = False
-                self.current_delay = max(self.current_delay * 0.9, self.min_delay)
-                logger.info(f"Exiting conservative mode, delay: {self.current_delay:.2f}s")
-        
-        self.last_adjustment = datetime.now()
+        direction = 1 if score > 0 else -1
+        if direction > 0 and now < self.locked_until:
+            return  # Oscillation lock: only slowing down is allowed
+        
+        if self.last_direction and direction != self.last_direction:
+            self.direction_flips.append(now)
+            while now - self.direction_flips[0] > self.oscillation_window:
+                self.direction_flips.popleft()
+            if len(self.direction_flips) >= self.max_direction_flips:
+                self.direction_flips.clear()
+                self.locked_until = now + self.oscillation_window
+                logger.info(f"Rate limiter oscillating, holding speed-ups for {self.oscillation_window}s")
+        self.last_direction = direction
+        
+        self.speed_factor = max(self.min_speed_factor, min(self.speed_factor * (1 + 0.25 * score), self.max_speed_factor))
+        self.current_delay = self.initial_delay / self.speed_factor
+        logger.info(f"Speed factor x{self.speed_factor:.2f} ({self._mode_name(self.speed_factor)} mode), delay: {self.current_delay:.2f}s")
+    
+    @staticmethod
+    def _mode_name(speed_factor: float) -> str:
+        """Describe a speed factor as aggressive, conservative or normal"""
+        if speed_factor >= 1.1:
+            return 'aggressive'
+        if speed_factor <= 0.9:
+            return 'conservative'
+        return 'normal'
     
     def get_stats(self) -> Dict:
         """Get current statistics"""
-        with self.lock:
-            duration = datetime.now() - self.start_time
-            requests_per_minute = self.total_requests / (duration.total_seconds() / 60) if duration.total_seconds() > 0 else 0
+        # Counter-derived stats only change when a request is recorded, so they are
+        # cached by request count (read without the lock) and rebuilt on change
+        cached = self._stats_cache
+        if cached is None or self._pending_outcomes or cached[0] != self.total_requests:
+            with self.lock:
+                self._apply_pending_outcomes()
+                total_requests = self.total_requests
+                successful_requests = self.successful_requests
+                blocked_requests = self.blocked_requests
+                current_delay = self.current_delay
+                speed_factor = self.speed_factor
             
-            return {
-                'total_requests': self.total_requests,
-                'successful_requests': self.successful_requests,
-                'blocked_requests': self.blocked_requests,
-                'success_rate': self.successful_requests / self.total_requests if self.total_requests > 0 else 0,
-                'blocked_rate': self.blocked_requests / self.total_requests if self.total_requests > 0 else 0,
-                'current_delay': self.current_delay,
-                'mode': 'aggressive' if self.aggressive_mode else 'conservative' if self.conservative_mode else 'normal',
-                'requests_per_minute': requests_per_minute,
-                'duration': str(duration)
-            }
+            cached = (total_requests, {
+                'total_requests': total_requests,
+                'successful_requests': successful_requests,
+                'blocked_requests': blocked_requests,
+                'success_rate': successful_requests / total_requests if total_requests > 0 else 0,
+                'blocked_rate': blocked_requests / total_requests if total_requests > 0 else 0,
+                'current_delay': current_delay,
+                'speed_factor': speed_factor,
+                'mode': self._mode_name(speed_factor)
+            })
+            self._stats_cache = cached
+        
+        total_requests, stats = cached
+        elapsed = time.monotonic() - self.start_time
+        requests_per_minute = total_requests / (elapsed / 60) if elapsed > 0 else 0
+        
+        return {
+            **stats,
+            'requests_per_minute': requests_per_minute,
+            'duration_seconds': elapsed
+        }
 
 class BatchRateLimiter:
     """
     Rate limiter optimized for batch processing of large datasets
     """
     
+    __slots__ = (
+        'batch_size', 'batch_delay', 'max_concurrent_batches',
+        'active_batches', 'lock', 'slot_available', 'last_batch_time'
+    )
+    
     def __init__(self, 
                  batch_size: int = 100,
                  batch_delay: float = 5.0,
@@ -182,38 +281,59 @@ class BatchRateLimiter:
         
         self.active_batches = 0
         self.lock = Lock()
+        self.slot_available = Condition(self.lock)
         self.last_batch_time = 0
     
     def can_start_batch(self) -> bool:
         """Check if we can start a new batch"""
         with self.lock:
-            if self.active_batches >= self.max_concurrent_batches:
-                return False
-            
-            # Ensure minimum delay between batches
-            current_time = time.time()
-            if current_time - self.last_batch_time < self.batch_delay:
-                return False
-            
-            self.active_batches += 1
-            self.last_batch_time = current_time
-            return True
+            return self._claim_batch_slot()
+    
+    def _claim_batch_slot(self) -> bool:
+        """Claim a batch slot if one is free (caller holds the lock)"""
+        if self.active_batches >= self.max_concurrent_batches:
+            return False
+        
+        # Ensure minimum delay between batches
+        current_time = time.time()
+        if current_time - self.last_batch_time < self.batch_delay:
+            return False
+        
+        self.active_batches += 1
+        self.last_batch_time = current_time
+        return True
     
     def finish_batch(self):
         """Mark a batch as finished"""
-        with self.lock:
+        with self.slot_available:
             self.active_batches = max(0, self.active_batches - 1)
+            self.slot_available.notify()
     
     def wait_for_batch_slot(self):
         """Wait until a batch slot is available"""
-        while not self.can_start_batch():
-            time.sleep(1)
+        with self.slot_available:
+            while not self._claim_batch_slot():
+                if self.active_batches >= self.max_concurrent_batches:
+                    # Woken by finish_batch
+                    self.slot_available.wait()
+                else:
+                    # Sleep out the remaining delay between batches
+                    self.slot_available.wait(self.batch_delay - (time.time() - self.last_batch_time))
+            
+            # Pass on the wakeup if more slots are free than this waiter needed
+            if self.active_batches < self.max_concurrent_batches:
+                self.slot_available.notify()
 
 class AdaptiveProxyManager:
     """
     Enhanced proxy manager with smart rate limiting
     """
     
+    __slots__ = (
+        'proxy_list', 'rate_limiters', 'batch_limiter',
+        'ranking_cooldown', '_best_proxy', '_last_ranking'
+    )
+    
     def __init__(self, proxy_list: List[str] = None):
         self.proxy_list = proxy_list or []
         self.rate_limiters = {}  # One per proxy
@@ -222,18 +342,34 @@ class AdaptiveProxyManager:
         # Initialize rate limiters for each proxy
         for proxy in self.proxy_list:
             self.rate_limiters[proxy] = SmartRateLimiter()
+        
+        # Best proxy is re-ranked at most once per cooldown to avoid flip-flopping
+        self.ranking_cooldown = 30  # seconds between re-rankings
+        self._best_proxy = None
+        self._last_ranking = 0.0
     
     def get_proxy_with_limiter(self, proxy: str) -> Optional[SmartRateLimiter]:
         """Get rate limiter for specific proxy"""
         return self.rate_limiters.get(proxy)
     
     def get_best_proxy(self) -> Optional[str]:
-        """Get proxy with best recent performance"""
+        """Get proxy with best recent performance (lowest delay, then highest success rate)"""
         if not self.proxy_list:
             return None
         
-        # Simple selection - could be enhanced with more sophisticated logic
-        return random.choice(self.proxy_list)
+        now = time.monotonic()
+        if self._best_proxy is None or now - self._last_ranking >= self.ranking_cooldown:
+            self._best_proxy = min(self.proxy_list, key=self._proxy_rank)
+            self._last_ranking = now
+        
+        return self._best_proxy
+    
+    def _proxy_rank(self, proxy: str):
+        """Sort key for a proxy; untried proxies count as fully successful"""
+        limiter = self.rate_limiters[proxy]
+        total = limiter.total_requests
+        success_rate = limiter.successful_requests / total if total > 0 else 1.0
+        return limiter.current_delay, -success_rate
     
     def get_batch_stats(self) -> Dict:
         """Get statistics for all proxies"""